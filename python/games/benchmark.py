@@ -0,0 +1,315 @@
+# Imports necessary libraries for the benchmark suite
+import argparse  # Library for parsing the command line options
+import json  # Library for reading the baseline and writing the results
+import os  # Library for locating the baseline and selecting the SDL video driver
+import platform  # Library for recording where the results were measured
+import random  # Library for generating the board contents
+import sys  # Library for the exit status
+import time  # Library for timing the benchmarks
+
+# Render offscreen: draw_window and the renderers only need surfaces, never a real window
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame  # Library for the offscreen surfaces
+
+from tetris_engine import (TICK_MS, ACTIONS, Board, TetrisEngine, create_grid, convert_shape_format, valid_space,
+                           clear_rows, get_shape, shape_colors)
+from snake_engine import WINDOW_SIZE, PIXEL_SIZE, Snake, SnakeEngine, FreeCells, grid_cells, collision, off_limits, \
+    random_on_grid, UP, DOWN, LEFT, RIGHT
+
+# Baseline shipped next to this file
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+# Board fill levels of the end-to-end scenarios
+FILL_LEVELS = (0.0, 0.25, 0.5, 0.75, 0.95)
+
+
+def measure(func, number, repeat=9):
+    # Best time per call of ``func`` over ``repeat`` runs of ``number`` calls, in microseconds
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - start) / number
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1e6
+
+
+def locked_cells(fill, rng, columns=10, rows=20, color=shape_colors[0]):
+    # Locked positions covering ``fill`` of the board from the bottom up, one hole per row so nothing clears
+    locked = {}
+    for y in range(rows - 1, rows - 1 - int(round(fill * rows)), -1):
+        hole = rng.randrange(columns)
+        for x in range(columns):
+            if x != hole:
+                locked[(x, y)] = color
+    return locked
+
+
+def filled_board(fill, rng):
+    # Board with the locked cells of locked_cells()
+    board = Board()
+    board.lock(list(locked_cells(fill, rng)), shape_colors[0])
+    return board
+
+
+def hamiltonian_cycle(size=WINDOW_SIZE, cell=PIXEL_SIZE):
+    # Positions of a cycle through every cell: a serpentine over columns 1+, back up column 0
+    columns, rows = size[0] // cell, size[1] // cell
+    path = []
+    for y in range(rows):
+        xs = range(1, columns) if y % 2 == 0 else range(columns - 1, 0, -1)
+        path.extend((x * cell, y * cell) for x in xs)
+    path.extend((0, y * cell) for y in range(rows - 1, -1, -1))
+    return path
+
+
+def direction_between(a, b):
+    # Direction moving from one cell to the next
+    if b[0] > a[0]:
+        return RIGHT
+    if b[0] < a[0]:
+        return LEFT
+    return DOWN if b[1] > a[1] else UP
+
+
+def snake_engine_at(fill, seed=0):
+    # SnakeEngine whose snake covers ``fill`` of the board along the Hamiltonian cycle, heading on along it
+    cycle = hamiltonian_cycle()
+    length = max(3, int(fill * len(cycle)))
+    engine = SnakeEngine(seed=seed)
+    body = [cycle[i] for i in range(length - 1, -1, -1)]   # Head first
+    engine.snake = Snake(body)
+    engine.free_cells = FreeCells(pos for pos in grid_cells() if pos not in engine.snake.occupied)
+    engine.apple_pos = engine.free_cells.sample(engine.rng)
+    engine.direction = direction_between(body[1], body[0])
+    return engine, cycle, length - 1
+
+
+# Micro benchmarks: one call of a per-frame function
+
+def bench_create_grid(fill):
+    locked = locked_cells(fill, random.Random(0))
+    return lambda: create_grid(locked)
+
+
+def bench_convert_shape_format():
+    piece = get_shape(random.Random(0))
+    return lambda: convert_shape_format(piece)
+
+
+def bench_valid_space(fill):
+    rng = random.Random(0)
+    grid = create_grid(locked_cells(fill, rng))
+    piece = get_shape(rng)
+    return lambda: valid_space(piece, grid)
+
+
+def bench_valid_space_board(fill):
+    rng = random.Random(0)
+    board = filled_board(fill, rng)
+    piece = get_shape(rng)
+    return lambda: valid_space(piece, board)
+
+
+def bench_clear_rows(fill):
+    # Clears the bottom row of a copy of the board every call
+    locked = locked_cells(fill, random.Random(0))
+    for x in range(10):
+        locked[(x, 19)] = shape_colors[0]
+    grid = create_grid(locked)
+
+    def run():
+        clear_rows(grid, dict(locked))
+    return run
+
+
+def bench_draw_window(fill):
+    from tetris import draw_window
+    rng = random.Random(0)
+    surface = pygame.Surface((800, 700))
+    grid = create_grid(locked_cells(fill, rng))
+    piece = get_shape(rng)
+    positions = convert_shape_format(piece)
+    return lambda: draw_window(surface, grid, 120, 3, positions, piece.color)
+
+
+def bench_snake_tick(length):
+    # Snake.move plus the wall, body and apple checks of one tick, along the Hamiltonian cycle
+    cycle = hamiltonian_cycle()
+    snake = Snake([cycle[i] for i in range(length - 1, -1, -1)])
+    apple = cycle[-1]
+    state = [length - 1]
+
+    def run():
+        i = state[0]
+        a, b = cycle[i], cycle[(i + 1) % len(cycle)]
+        state[0] = (i + 1) % len(cycle)
+        snake.move(b[0] - a[0], b[1] - a[1])
+        if snake.collided or off_limits(snake.head):
+            raise RuntimeError('The benchmark snake crashed')
+        collision(apple, snake.head)
+    return run
+
+
+def bench_random_on_grid():
+    return random_on_grid
+
+
+# Macro benchmarks: whole frames of the headless engines
+
+def bench_tetris_frames(fill, frames=200):
+    # Plays ``frames`` frames of random actions at 60 FPS on a board pre-filled to ``fill``, redrawn offscreen
+    from tetris import TetrisRenderer
+    rng = random.Random(0)
+    engine = TetrisEngine(seed=0, board_factory=lambda: filled_board(fill, random.Random(1)))
+    renderer = TetrisRenderer(pygame.Surface((800, 700)))
+
+    def run():
+        for _ in range(frames):
+            engine.step(rng.choice(ACTIONS))
+            engine.tick(TICK_MS)
+            engine.tick(TICK_MS)
+            if engine.game_over:
+                engine.reset()
+            renderer.draw(engine)
+    return run
+
+
+def bench_snake_frames(fill, frames=200):
+    # Plays ``frames`` ticks of a snake covering ``fill`` of the board, following the Hamiltonian cycle
+    state = list(snake_engine_at(fill))
+
+    def run():
+        engine, cycle, i = state
+        for _ in range(frames):
+            i = (i + 1) % len(cycle)
+            if not engine.step(direction_between(engine.snake.head, cycle[i])):
+                engine, cycle, i = snake_engine_at(fill)  # Board full: start over at the same fill level
+        state[:] = engine, cycle, i
+    return run
+
+
+def suite(quick=False):
+    """
+    Every benchmark of the suite.
+
+    Returns:
+        list: (name, function to time, number of calls per run, frames per call or None) tuples.
+    """
+    scale = 0.2 if quick else 1.0
+    frames = 200
+    benchmarks = [
+        ('tetris.convert_shape_format', bench_convert_shape_format(), 20000, None),
+        ('snake.random_on_grid', bench_random_on_grid(), 20000, None),
+    ]
+    for fill in (0.0, 0.5, 0.95):
+        label = f'{int(fill * 100)}%'
+        benchmarks += [
+            (f'tetris.create_grid[{label}]', bench_create_grid(fill), 2000, None),
+            (f'tetris.valid_space[{label}]', bench_valid_space(fill), 5000, None),
+            (f'tetris.valid_space_board[{label}]', bench_valid_space_board(fill), 20000, None),
+            (f'tetris.clear_rows[{label}]', bench_clear_rows(fill), 2000, None),
+            (f'tetris.draw_window[{label}]', bench_draw_window(fill), 200, None),
+            (f'snake.tick[{label}]', bench_snake_tick(max(3, int(fill * 3600))), 20000, None),
+        ]
+    for fill in FILL_LEVELS:
+        label = f'{int(fill * 100)}%'
+        benchmarks += [
+            (f'tetris.frames[{label}]', bench_tetris_frames(fill, frames), 3, frames),
+            (f'snake.frames[{label}]', bench_snake_frames(fill, frames), 10, frames),
+        ]
+    return [(name, func, max(1, int(number * scale)), per) for name, func, number, per in benchmarks]
+
+
+def run_suite(pattern=None, quick=False, baseline=None, tolerance=0.5, retries=5):
+    """
+    Time every benchmark whose name contains ``pattern``.
+
+    Timings above the baseline tolerance are measured again up to ``retries``
+    times and the best timing is kept, so a moment of CPU contention does not
+    fail the run; a real regression is slow every time.
+
+    Returns:
+        dict: {name: microseconds per call, or per frame for the end-to-end scenarios}.
+    """
+    baseline = baseline or {}
+    results = {}
+    for name, func, number, frames in suite(quick):
+        if pattern and pattern not in name:
+            continue
+        us = measure(func, number) / (frames or 1)
+        for _ in range(retries):
+            if name not in baseline or us <= baseline[name] * (1 + tolerance):
+                break
+            time.sleep(0.5)  # Contention tends to come in bursts: give it a moment to pass
+            us = min(us, measure(func, number) / (frames or 1))
+        results[name] = us
+        print(f"{name:<36} {us:>12.2f} us{'/frame' if frames else ''}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results against a baseline.
+
+    Returns:
+        dict: {name: {'us', 'baseline', 'ratio', 'status'}}, status being 'ok', 'regression' or 'new'.
+    """
+    report = {}
+    for name, us in results.items():
+        base = baseline.get(name)
+        if base is None:
+            report[name] = {'us': us, 'baseline': None, 'ratio': None, 'status': 'new'}
+            continue
+        ratio = us / base
+        report[name] = {'us': us, 'baseline': base, 'ratio': ratio,
+                        'status': 'regression' if ratio > 1 + tolerance else 'ok'}
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the per-frame functions of Tetris and Snake.')
+    parser.add_argument('--filter', metavar='TEXT', help='only run the benchmarks whose name contains TEXT')
+    parser.add_argument('--quick', action='store_true', help='run fewer iterations')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='slowdown allowed before failing (0.5 = 50%%)')
+    parser.add_argument('--output', metavar='FILE', help='write the results and the comparison to FILE as JSON')
+    parser.add_argument('--retries', type=int, default=5, help='times a benchmark slower than the baseline is measured again')
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    pygame.font.init()
+    if args.save_baseline:
+        # Best of a few rounds, so the baseline is not recorded during a moment of CPU contention
+        results = run_suite(args.filter, args.quick)
+        for _ in range(args.retries):
+            for name, us in run_suite(args.filter, args.quick).items():
+                results[name] = min(results[name], us)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': dict(sorted(baseline.items()))}, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    results = run_suite(args.filter, args.quick, baseline, args.tolerance, args.retries)
+    report = compare(results, baseline, args.tolerance)
+    regressions = [name for name, entry in report.items() if entry['status'] == 'regression']
+    for name in regressions:
+        entry = report[name]
+        print(f"REGRESSION {name}: {entry['us']:.2f} us vs {entry['baseline']:.2f} us baseline ({entry['ratio']:.2f}x)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'tolerance': args.tolerance, 'results': report}, f, indent=2)
+    sys.exit(1 if regressions else 0)
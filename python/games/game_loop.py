@@ -0,0 +1,72 @@
+# Imports necessary libraries for the scheduler
+import time  # Library for reading the clock and sleeping between frames
+
+
+class FixedTimestep(object):
+    """
+    Scheduler that advances the simulation in fixed steps, independently of the render rate.
+
+    Every call to frame() waits until the next frame is due (so idle frames
+    sleep instead of spinning a core) and returns how many fixed simulation
+    steps have accumulated since the previous frame. Game speed therefore only
+    depends on the step length, never on frame jitter.
+
+    In headless mode the wall clock is ignored: frame() never sleeps and always
+    returns the number of steps that make up one frame at the target FPS (or a
+    single step without a target FPS), so simulations run as fast as the CPU allows.
+
+    Parameters:
+        step_ms (int): Length of one simulation step in milliseconds.
+        fps (int): Target render rate in frames per second, or None for no cap.
+        headless (bool): Run as fast as possible without reading the clock.
+        max_steps (int): Most steps returned for one frame, so a long stall
+            (e.g. dragging the window) does not trigger a burst of catch-up steps.
+    """
+
+    def __init__(self, step_ms=10, fps=60, headless=False, max_steps=25, clock=time.perf_counter, sleep=time.sleep):
+        self.step_ms = step_ms
+        self.fps = fps
+        self.headless = headless
+        self.max_steps = max_steps
+        self.clock = clock
+        self.sleep = sleep
+        self.frame_time = 1.0 / fps if fps else 0.0     # Seconds between two rendered frames
+        self.accumulator = 0.0                          # Milliseconds not yet consumed by a step
+        self.steps = 0                                  # Total number of steps handed out
+        self.frames = 0                                 # Total number of frames scheduled
+        self.last_time = clock()
+        self.next_frame = self.last_time + self.frame_time
+
+    def frame(self):
+        """
+        Wait for the next frame and return the number of simulation steps to run before drawing it.
+
+        Returns:
+            int: Number of steps of ``step_ms`` milliseconds to simulate.
+        """
+        self.frames += 1
+
+        if self.headless:
+            steps = max(1, round(self.frame_time * 1000 / self.step_ms)) if self.fps else 1
+            self.steps += steps
+            return steps
+
+        # Sleep until the frame is due instead of redrawing as fast as possible
+        if self.fps:
+            delay = self.next_frame - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+            # Schedule from the previous deadline to keep a steady rate, unless we fell behind
+            self.next_frame = max(self.next_frame + self.frame_time, self.clock())
+
+        now = self.clock()
+        self.accumulator += (now - self.last_time) * 1000
+        self.last_time = now
+
+        steps = int(self.accumulator // self.step_ms)
+        self.accumulator -= steps * self.step_ms
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = 0.0  # Drop the backlog rather than trying to catch up
+        self.steps += steps
+        return steps
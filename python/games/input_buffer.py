@@ -0,0 +1,170 @@
+# Imports necessary libraries for the input buffers
+import time  # Library for timestamping the key events
+from collections import deque  # Queue of the pending inputs and rolling latency samples
+
+
+class InputBuffer(object):
+    """
+    Queue of timestamped inputs, consumed in the order they were pressed.
+
+    Every input keeps the time it was queued. pygame events carry no time of
+    their own, so a game loop passes the time of its previous event poll as
+    ``timestamp``: that is the earliest the key can have been pressed, and
+    the wait between frames counts towards the latency. Inputs taken from
+    the queue wait in ``unshown`` until the game calls shown() after the
+    display update that makes them visible, which records the delay between
+    the key press and its effect; latency() reports rolling percentiles of
+    that delay. The queue is bounded: inputs beyond ``maxlen`` are dropped
+    (and counted) instead of piling up a backlog that would play out long
+    after the keys were released.
+
+    Parameters:
+        maxlen (int): Most inputs waiting in the queue.
+        clock (callable): Returns the current time in seconds.
+        window (int): Number of recent latency samples kept for the percentiles.
+    """
+
+    def __init__(self, maxlen=8, clock=time.perf_counter, window=600):
+        self.events = deque()                   # Pending (timestamp, value) inputs, oldest first
+        self.maxlen = maxlen
+        self.clock = clock
+        self.latencies = deque(maxlen=window)   # Seconds between queuing and showing recent inputs
+        self.unshown = []                       # Timestamps of the inputs applied but not on screen yet
+        self.dropped = 0                        # Inputs dropped because the queue was full
+
+    def __len__(self):
+        return len(self.events)
+
+    def push(self, value, timestamp=None):
+        # Queues an input, returning False if the queue is full
+        if len(self.events) >= self.maxlen:
+            self.dropped += 1
+            return False
+        self.events.append((self.clock() if timestamp is None else timestamp, value))
+        return True
+
+    def applied(self, timestamp, now=None):
+        # Records the latency of an input whose effect the game just showed
+        self.latencies.append((self.clock() if now is None else now) - timestamp)
+
+    def shown(self, now=None):
+        # Records the latency of every input applied since the last display update
+        now = self.clock() if now is None else now
+        for timestamp in self.unshown:
+            self.applied(timestamp, now)
+        self.unshown.clear()
+
+    def clear(self):
+        self.events.clear()
+
+    def latency(self):
+        """
+        Rolling percentiles of the input-to-effect latency.
+
+        Returns:
+            tuple: (p50, p95, p99) in milliseconds, or None before any input was applied.
+        """
+        samples = sorted(self.latencies)
+        if not samples:
+            return None
+        last = len(samples) - 1
+        return tuple(samples[min(last, int(p * len(samples)))] * 1000 for p in (0.50, 0.95, 0.99))
+
+
+class TurnBuffer(InputBuffer):
+    """
+    Direction changes for Snake, applied at most one per tick and in the order they were pressed.
+
+    A quick "up, left" while heading right turns up on the next tick and
+    left on the one after, instead of the last key overwriting the first
+    (and being rejected as a reversal). Turns that would not change the
+    direction on their tick (the current direction or its opposite) are
+    skipped, so they do not use up a tick.
+
+    Parameters:
+        maxlen (int): Most turns waiting in the queue.
+    """
+
+    def __init__(self, maxlen=3, **kwargs):
+        super().__init__(maxlen, **kwargs)
+
+    def next_turn(self, direction, opposite):
+        """
+        Pop the turn to apply on this tick.
+
+        Parameters:
+            direction (int): Current direction of the snake.
+            opposite (dict): Opposite of every direction.
+
+        Returns:
+            int: The new direction, or None to keep going straight.
+        """
+        while self.events:
+            timestamp, turn = self.events.popleft()
+            if turn != direction and turn != opposite[direction]:
+                self.unshown.append(timestamp)
+                return turn
+        return None
+
+
+class AutoRepeat(InputBuffer):
+    """
+    Held-key auto-repeat for Tetris, with a delayed auto shift (DAS) and an auto repeat rate (ARR).
+
+    A key press queues its action at once; if the key is still held
+    ``das_ms`` later the action repeats every ``arr_ms`` until the key is
+    released. Repeats are timestamped with the time they were due, so a
+    slow frame applies the ones it missed (up to ``max_repeats`` per key)
+    and their latency shows how late they came.
+
+    Parameters:
+        das_ms (float): Delay before a held key starts repeating, in milliseconds.
+        arr_ms (float): Interval between repeats, in milliseconds (0 repeats max_repeats times per frame).
+        max_repeats (int): Most repeats of one key queued by a single update.
+    """
+
+    def __init__(self, das_ms=170, arr_ms=50, max_repeats=10, maxlen=32, **kwargs):
+        super().__init__(maxlen, **kwargs)
+        self.das = das_ms / 1000.0
+        self.arr = arr_ms / 1000.0
+        self.max_repeats = max_repeats
+        self.held = {}      # Held key -> [action, time the next repeat is due]
+
+    def press(self, key, action, repeat=True, timestamp=None):
+        # Queues the action of a pressed key and starts its auto-repeat timer
+        timestamp = self.clock() if timestamp is None else timestamp
+        self.push(action, timestamp)
+        if repeat:
+            self.held[key] = [action, timestamp + self.das]
+
+    def release(self, key):
+        # Stops the auto-repeat of a released key
+        self.held.pop(key, None)
+
+    def update(self, now=None):
+        # Queues the repeats of the held keys that are due
+        now = self.clock() if now is None else now
+        for state in self.held.values():
+            action, due = state
+            repeats = 0
+            while due <= now and repeats < self.max_repeats:
+                self.push(action, due)
+                due += self.arr
+                repeats += 1
+            state[1] = max(due, now) if repeats == self.max_repeats else due
+
+    def actions(self, now=None):
+        """
+        Pop every action due by now, in the order they happened.
+
+        Returns:
+            list: Actions to apply on this frame.
+        """
+        now = self.clock() if now is None else now
+        self.update(now)
+        if not self.events:
+            return []
+        events = sorted(self.events, key=lambda event: event[0])
+        self.events.clear()
+        self.unshown.extend(timestamp for timestamp, _ in events)
+        return [action for _, action in events]
@@ -0,0 +1,183 @@
+# Imports necessary libraries for the frame profiler
+import csv  # Library for writing the trace as CSV
+import json  # Library for writing the trace as JSON
+from collections import deque  # Bounded queues holding the rolling samples
+from time import perf_counter_ns  # Monotonic clock with nanosecond resolution
+
+
+class Phase(object):
+    # Context manager timing one named phase of the current frame
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, perf_counter_ns() - self.start)
+        return False
+
+
+class NullPhase(object):
+    # Context manager doing nothing, returned by a disabled profiler
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+null_phase = NullPhase()
+
+
+class FrameProfiler(object):
+    """
+    Times named phases of every frame (input, simulation, drawing, display update...).
+
+    Wrap each phase of the game loop in ``with profiler.phase('draw'):`` (or
+    start each one with ``profiler.mark('draw')``) and call end_frame() once
+    per frame. The last ``window`` samples of every phase
+    are kept for rolling p50/p95/p99 statistics, which can be shown on screen
+    with draw_overlay(), and every frame is kept in a trace written by dump().
+
+    When disabled, phase() returns a shared no-op context manager and
+    mark() and end_frame() return immediately, so the hooks can stay in the loop.
+
+    Parameters:
+        enabled (bool): Whether to collect timings at all.
+        show_overlay (bool): Whether draw_overlay() draws anything.
+        window (int): Number of recent samples per phase used for the percentiles.
+        max_frames (int): Most frames kept in the trace (older frames are dropped).
+    """
+
+    def __init__(self, enabled=True, show_overlay=False, window=600, max_frames=100000):
+        self.enabled = enabled
+        self.show_overlay = enabled and show_overlay
+        self.window = window
+        self.samples = {}                       # Rolling nanosecond samples, keyed by phase name
+        self.phases = {}                        # Reusable Phase objects, keyed by phase name
+        self.current = {}                       # Phase durations of the frame in progress
+        self.trace = deque(maxlen=max_frames)   # One {phase: ns} dict per finished frame
+        self.frames = 0
+        self.marked = None                      # Phase opened by the last mark() call
+        self.marked_at = 0
+        self.overlay_surface = None
+        self.overlay_frame = -1
+
+    def phase(self, name):
+        # Returns the context manager timing the named phase
+        if not self.enabled:
+            return null_phase
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(self, name)
+            self.samples[name] = deque(maxlen=self.window)
+        return phase
+
+    def mark(self, name):
+        """
+        Close the phase opened by the previous mark() and open the named one.
+
+        Useful for loops where phases are interleaved and cannot be wrapped in
+        ``with`` blocks. end_frame() closes the last marked phase.
+        """
+        if not self.enabled:
+            return
+        now = perf_counter_ns()
+        if self.marked is not None:
+            self.add(self.marked, now - self.marked_at)
+        self.phase(name)
+        self.marked = name
+        self.marked_at = now
+
+    def add(self, name, ns):
+        # Adds a duration to a phase of the current frame (a phase may run several times per frame)
+        self.current[name] = self.current.get(name, 0) + ns
+
+    def end_frame(self):
+        # Closes the current frame, moving its timings to the rolling samples and the trace
+        if not self.enabled:
+            return
+        if self.marked is not None:
+            self.add(self.marked, perf_counter_ns() - self.marked_at)
+            self.marked = None
+        for name, ns in self.current.items():
+            self.samples[name].append(ns)
+        self.trace.append(self.current)
+        self.current = {}
+        self.frames += 1
+
+    def percentiles(self, name):
+        """
+        Rolling percentiles of a phase.
+
+        Returns:
+            tuple: (p50, p95, p99) in nanoseconds, or None without samples.
+        """
+        samples = sorted(self.samples.get(name, ()))
+        if not samples:
+            return None
+        last = len(samples) - 1
+        return tuple(samples[min(last, int(p * len(samples)))] for p in (0.50, 0.95, 0.99))
+
+    def summary(self):
+        # Percentiles of every phase, in milliseconds
+        summary = {}
+        for name in self.samples:
+            stats = self.percentiles(name)
+            if stats is not None:
+                summary[name] = {key: ns / 1e6 for key, ns in zip(('p50', 'p95', 'p99'), stats)}
+        return summary
+
+    def draw_overlay(self, surface, font, pos=(5, 5), every=30):
+        """
+        Draw the per-phase percentiles on a surface.
+
+        The text is only re-rendered every ``every`` frames; in between the
+        cached overlay is blitted again.
+
+        Returns:
+            pygame.Rect: Area of the surface covered by the overlay, or None when it is not shown.
+        """
+        if not self.show_overlay:
+            return None
+        if self.overlay_surface is None or self.frames - self.overlay_frame >= every:
+            import pygame  # Only needed when the overlay is shown
+
+            lines = ['phase      p50    p95    p99 (ms)']
+            for name, stats in self.summary().items():
+                lines.append(f"{name:<8} {stats['p50']:6.2f} {stats['p95']:6.2f} {stats['p99']:6.2f}")
+            labels = [font.render(line, 1, (255, 255, 0)) for line in lines]
+            height = sum(label.get_height() for label in labels)
+            self.overlay_surface = pygame.Surface((max(label.get_width() for label in labels), height))
+            y = 0
+            for label in labels:
+                self.overlay_surface.blit(label, (0, y))
+                y += label.get_height()
+            self.overlay_frame = self.frames
+        return surface.blit(self.overlay_surface, pos)
+
+    def dump(self, path):
+        # Writes the percentiles and the per-frame trace to a .json or .csv file
+        if not self.enabled or not path:
+            return
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['frame', 'phase', 'ns'])
+                first = self.frames - len(self.trace)
+                for i, frame in enumerate(self.trace):
+                    for name, ns in frame.items():
+                        writer.writerow([first + i, name, ns])
+        else:
+            with open(path, 'w') as f:
+                json.dump({'frames': self.frames, 'summary_ms': self.summary(), 'trace_ns': list(self.trace)}, f)
@@ -1,147 +1,169 @@
+import argparse
 import warnings
-
-# Disable all warnings
-warnings.filterwarnings("ignore")
-
 import pygame
 from pygame.locals import *
-import random
 
+from profiler import FrameProfiler
 
-# Setting Up Constants
-WINDOW_SIZE = (600, 600)
-PIXEL_SIZE = 10
 
+# Game rules live in the pygame-free engine module
+from snake_engine import WINDOW_SIZE, PIXEL_SIZE, UP, DOWN, LEFT, RIGHT, OPPOSITE, SnakeEngine
+from input_buffer import TurnBuffer
 
-# Helper Functions
 
-# Collision detection function
-def collision(pos1, pos2):
-    """
-    Check if two positions are colliding.
+KEY_DIRECTIONS = {K_UP: UP, K_DOWN: DOWN, K_LEFT: LEFT, K_RIGHT: RIGHT}  # Engine direction for each arrow key.
 
-    Parameters:
-        pos1 (tuple): Position of the first object.
-        pos2 (tuple): Position of the second object.
 
-    Returns:
-        bool: True if the positions are equal (colliding), False otherwise.
+class SnakeRenderer(object):
     """
-    return pos1 == pos2  # Returns True if the positions are equal, indicating a collision.
-
+    Incremental renderer: each frame only the cells that changed are redrawn and pushed to the screen.
 
-# Boundary Check function
-def off_limits(pos):
-    """
-    Check if a position is within the boundaries of the game window.
+    Between ticks only the new head, the cell the tail left, the apple and
+    sometimes the score change, so the cost of a frame does not depend on
+    the length of the snake. The score text is rendered once per value.
+    A full redraw happens on the first frame and after a restart.
 
     Parameters:
-        pos (tuple): Position to check.
-
-    Returns:
-        bool: True if the position is off the limits, False if within the limits.
+        surface (pygame.Surface): Window surface to draw on.
     """
-    if 0 <= pos[0] < WINDOW_SIZE[0] and 0 <= pos[1] < WINDOW_SIZE[1]:  # Check if the position is within the window bounds.
-        return False  # Position is within the limits.
-    else:
-        return True  # Position is off the limits.
-
 
-
-# Generate a random position for the apple function
-def random_on_grid():
+    def __init__(self, surface):
+        self.surface = surface
+        self.snake_surface = pygame.Surface((PIXEL_SIZE, PIXEL_SIZE))  # Create a surface for the snake of size PIXEL_SIZE x PIXEL_SIZE.
+        self.snake_surface.fill((0, 255, 0))  # Fill the snake surface with green color.
+        self.apple_surface = pygame.Surface((PIXEL_SIZE, PIXEL_SIZE))  # Create a surface for the apple of size PIXEL_SIZE x PIXEL_SIZE.
+        self.apple_surface.fill((255, 0, 0))  # Fill the apple surface with red color.
+        self.font = pygame.font.SysFont(None, 35)  # Set the font for displaying the score.
+        self.snake = None  # Snake drawn on the last frame, a new one triggers a full redraw.
+        self.apple = None  # Apple position drawn on the last frame.
+        self.score = None  # Score drawn on the last frame.
+        self.score_text = None  # Cached rendering of the score.
+        self.score_rect = pygame.Rect(0, 0, 0, 0)  # Area covered by the score text.
+
+    def cell(self, pos):
+        return pygame.Rect(pos[0], pos[1], PIXEL_SIZE, PIXEL_SIZE)
+
+    def redraw_area(self, rect, snake, apple_pos):
+        # Clears an area and redraws the snake segments and the apple inside it.
+        self.surface.fill((0, 0, 0), rect)
+        for x in range(rect.left // PIXEL_SIZE * PIXEL_SIZE, rect.right, PIXEL_SIZE):
+            for y in range(rect.top // PIXEL_SIZE * PIXEL_SIZE, rect.bottom, PIXEL_SIZE):
+                if (x, y) in snake.occupied:
+                    self.surface.blit(self.snake_surface, (x, y))
+                elif (x, y) == apple_pos:
+                    self.surface.blit(self.apple_surface, (x, y))
+
+    def draw(self, snake, apple_pos, score, tail):
+        """
+        Draw the changes of the last tick.
+
+        Parameters:
+            snake (Snake): The snake, after its move.
+            apple_pos (tuple): Position of the apple.
+            score (int): Current score.
+            tail (tuple): Position the tail left on the last move, or None.
+
+        Returns:
+            list: Rectangles of the screen that changed.
+        """
+        screen_rect = self.surface.get_rect()
+        if snake is not self.snake:
+            # First frame or restart: draw everything.
+            self.surface.fill((0, 0, 0))
+            for pos in snake.body:
+                self.surface.blit(self.snake_surface, pos)
+            self.surface.blit(self.apple_surface, apple_pos)
+            self.snake, self.apple, self.score = snake, apple_pos, None
+            dirty = [screen_rect]
+        else:
+            dirty = []
+            if tail is not None and tail != snake.head:
+                self.surface.fill((0, 0, 0), self.cell(tail))  # Clear the cell the tail left.
+                dirty.append(self.cell(tail))
+            self.surface.blit(self.snake_surface, snake.head)  # Draw the new head.
+            dirty.append(self.cell(snake.head))
+            if apple_pos != self.apple:
+                self.surface.blit(self.apple_surface, apple_pos)  # Draw the new apple (the old one was eaten by the head).
+                dirty.append(self.cell(apple_pos))
+                self.apple = apple_pos
+
+        # Redraw the score when it changed or when the snake moved under it.
+        if score != self.score or self.score_rect.collidelist(dirty) != -1:
+            if score != self.score:
+                self.score_text = self.font.render('Score: ' + str(score), True, (255, 255, 255))  # Render the score text in white color.
+                self.score = score
+            area = self.score_rect.union(self.score_text.get_rect())
+            self.redraw_area(area, snake, apple_pos)
+            self.score_rect = self.surface.blit(self.score_text, [0, 0])  # Draw the score text at the top left corner.
+            dirty.append(area)
+
+        return [rect.clip(screen_rect) for rect in dirty]
+
+def main(profiler=None, profile=None):
     """
-    Generate a random position within the grid for the apple.
+    Open the window and play Snake until it is closed.
 
-    Returns:
-        tuple: Random position within the grid, aligned to the grid cell size.
+    Parameters:
+        profiler (FrameProfiler): Times the frame phases, disabled by default.
+        profile (str): Path the frame timings are written to when the window is closed.
     """
-    x = random.randint(0, WINDOW_SIZE[0] - PIXEL_SIZE)  # Generate a random x-coordinate within the grid.
-    y = random.randint(0, WINDOW_SIZE[1] - PIXEL_SIZE)  # Generate a random y-coordinate within the grid.
-    return x // PIXEL_SIZE * PIXEL_SIZE, y // PIXEL_SIZE * PIXEL_SIZE  # Align the coordinates to the grid cell size and return as a tuple.
-
-
-
-# Step 4
-pygame.init()  # Initialize all imported Pygame modules.
-screen = pygame.display.set_mode(WINDOW_SIZE)  # Set the display window size.
-pygame.display.set_caption('Snake')  # Set the window title to 'Snake'.
-
-# Step 5
-snake_pos = [(250, 50), (260, 50), (270, 50)]  # Initial position of the snake as a list of tuples.
-snake_surface = pygame.Surface((PIXEL_SIZE, PIXEL_SIZE))  # Create a surface for the snake of size PIXEL_SIZE x PIXEL_SIZE.
-snake_surface.fill((0, 255, 0))  # Fill the snake surface with green color.
-snake_direction = K_LEFT  # Initial direction of the snake is left.
-
-apple_surface = pygame.Surface((PIXEL_SIZE, PIXEL_SIZE))  # Create a surface for the apple of size PIXEL_SIZE x PIXEL_SIZE.
-apple_surface.fill((255, 0, 0))  # Fill the apple surface with red color.
-apple_pos = random_on_grid()  # Place the apple at a random position on the grid.
-
-# Step 6
-score = 0  # Initialize the score to zero.
-font = pygame.font.SysFont(None, 35)  # Set the font for displaying the score.
-
-def display_score(score):
-    score_text = font.render('Score: '+ str(score), True, (255, 255, 255))  # Render the score text in white color.
-    screen.blit(score_text, [0, 0])  # Draw the score text on the screen at the top left corner.
-
-# Step 7
-def restart_game():
-    global snake_pos, apple_pos, snake_direction, score
-    snake_pos = [(250, 50), (260, 50), (270, 50)]  # Reset snake position.
-    snake_direction = K_LEFT  # Reset snake direction to left.
-    apple_pos = random_on_grid()  # Place the apple at a random position on the grid.
-    score = 0  # Reset score to zero.
-
-# Step 8
-while True:
-    pygame.time.Clock().tick(15)  # Control the game speed, 15 frames per second.
-    screen.fill((0, 0, 0))  # Fill the screen with black color, effectively clearing it.
-
-    for event in pygame.event.get():
-        if event.type == QUIT:  # If the quit event is triggered (window closed), exit the game.
-            pygame.quit()  # Uninitialize all Pygame modules.
-            quit()  # Exit the program.
-
-        elif event.type == KEYDOWN:  # If a key is pressed down.
-            if event.key in [K_UP, K_DOWN, K_LEFT, K_RIGHT]:  # If the key is an arrow key.
-                # Change direction only if it's not directly opposite to the current direction.
-                if (event.key == K_UP and snake_direction != K_DOWN) or \
-                    (event.key == K_DOWN and snake_direction != K_UP) or \
-                    (event.key == K_LEFT and snake_direction != K_RIGHT) or \
-                    (event.key == K_RIGHT and snake_direction != K_LEFT):
-                    snake_direction = event.key  # Update snake direction.
-
-    screen.blit(apple_surface, apple_pos)  # Draw the apple on the screen at its current position.
-
-    # Collisions
-    if collision(apple_pos, snake_pos[0]):  # Check if the snake's head collides with the apple.
-        snake_pos.append((-10, -10))  # Add a new segment to the snake (initially off-screen).
-        apple_pos = random_on_grid()  # Place a new apple at a random position on the grid.
-        score += 1  # Increment the score.
-
-    for pos in snake_pos:  # For each segment of the snake.
-        screen.blit(snake_surface, pos)  # Draw the segment on the screen.
-
-    for i in range(len(snake_pos) - 1, 0, -1):  # Check for self-collision from the tail towards the head.
-        if collision(snake_pos[0], snake_pos[i]):  # If the head collides with any segment.
-            restart_game()  # Restart the game.
-            break
-        snake_pos[i] = snake_pos[i-1]  # Move the segment to the position of the previous segment.
-
-    # Screen limits
-    if off_limits(snake_pos[0]):  # Check if the snake's head is outside the screen boundaries.
-        restart_game()  # Restart the game.
-
-    # Snake direction update
-    if snake_direction == K_UP:  # If the direction is up.
-        snake_pos[0] = (snake_pos[0][0], snake_pos[0][1] - PIXEL_SIZE)  # Move the head up by PIXEL_SIZE.
-    elif snake_direction == K_DOWN:  # If the direction is down.
-        snake_pos[0] = (snake_pos[0][0], snake_pos[0][1] + PIXEL_SIZE)  # Move the head down by PIXEL_SIZE.
-    elif snake_direction == K_LEFT:  # If the direction is left.
-        snake_pos[0] = (snake_pos[0][0] - PIXEL_SIZE, snake_pos[0][1])  # Move the head left by PIXEL_SIZE.
-    elif snake_direction == K_RIGHT:  # If the direction is right.
-        snake_pos[0] = (snake_pos[0][0] + PIXEL_SIZE, snake_pos[0][1])  # Move the head right by PIXEL_SIZE.
-
-    display_score(score)  # Display the current score on the screen.
-    pygame.display.update()  # Update the display with the new changes.
+    if profiler is None:
+        profiler = FrameProfiler(enabled=False)
+
+    # Step 4
+    pygame.init()  # Initialize all imported Pygame modules.
+    screen = pygame.display.set_mode(WINDOW_SIZE)  # Set the display window size.
+    pygame.display.set_caption('Snake')  # Set the window title to 'Snake'.
+
+    # Step 5
+    engine = SnakeEngine()  # The game state: snake, apple and score.
+    turns = TurnBuffer()  # Arrow keys pressed since the last tick, applied one per tick.
+    renderer = SnakeRenderer(screen)  # Draws the changes of every frame.
+    overlay_font = pygame.font.SysFont(None, 20)  # Smaller font for the frame timings overlay.
+    clock = pygame.time.Clock()  # Created once, so the frame cap actually holds.
+    polled = turns.clock()  # Time of the last event poll: keys read by the next one were pressed after it.
+
+    while True:
+        clock.tick(15)  # Control the game speed, 15 frames per second.
+        profiler.mark('input')  # Time the frame phases, if profiling.
+        for event in pygame.event.get():
+            if event.type == QUIT:  # If the quit event is triggered (window closed), stop the game.
+                profiler.dump(profile)  # Write the frame timings, if profiling.
+                if profiler.enabled and turns.latency() is not None:
+                    print('Input latency p50/p95/p99 (ms): ' + ' / '.join(f'{ms:.1f}' for ms in turns.latency()))
+                return
+
+            elif event.type == KEYDOWN:  # If a key is pressed down.
+                if event.key in KEY_DIRECTIONS:  # If the key is an arrow key.
+                    turns.push(KEY_DIRECTIONS[event.key], polled)  # Queue the turn, so quick key sequences are not lost.
+        polled = turns.clock()
+
+        profiler.mark('update')
+        if not engine.step(turns.next_turn(engine.direction, OPPOSITE)):  # Move the snake, eat the apple, check the walls and the body.
+            engine.reset()  # Restart the game.
+            turns.clear()  # Forget the keys pressed before the crash.
+
+        profiler.mark('draw')
+        dirty_rects = renderer.draw(engine.snake, engine.apple_pos, engine.score, engine.tail)  # Draw only what changed since the last frame.
+        overlay_rect = profiler.draw_overlay(screen, overlay_font, (WINDOW_SIZE[0] - 220, 0))  # Draw the frame timings, if enabled.
+        if overlay_rect is not None:
+            dirty_rects.append(overlay_rect)
+
+        profiler.mark('display')
+        pygame.display.update(dirty_rects)  # Push only the changed areas to the display.
+        turns.shown()  # The turn of this tick is on screen now.
+        profiler.end_frame()
+
+
+if __name__ == "__main__":
+    # Command line options: frame phase profiling
+    parser = argparse.ArgumentParser(description='Play Snake.')
+    parser.add_argument('--profile', metavar='FILE', help='time every frame phase and write the trace to FILE (.json or .csv)')
+    parser.add_argument('--overlay', action='store_true', help='show the frame phase timings on screen')
+    args = parser.parse_args()
+
+    # Disable all warnings while the game runs, without silencing modules that import this one
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        main(FrameProfiler(enabled=bool(args.profile or args.overlay), show_overlay=args.overlay), args.profile)
+    pygame.quit()  # Uninitialize all Pygame modules.
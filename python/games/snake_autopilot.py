@@ -0,0 +1,209 @@
+# Imports necessary libraries for the Snake auto-player
+import argparse  # Library for parsing the benchmark options
+import time  # Library for measuring the benchmark throughput
+from collections import deque  # Double-ended queue used by the breadth-first searches
+
+from snake_engine import OPPOSITE, SnakeEngine
+
+
+class SnakeAutopilot(object):
+    """
+    Auto-player steering a SnakeEngine toward the apple without boxing itself in.
+
+    The shortest path to the apple is found with a breadth-first search and
+    cached: while the apple stays put and the snake follows the path, every
+    tick just pops the next step. Before a new path is used, the snake is
+    moved along it on a copy of the body and the path is only accepted if the
+    tail can still be reached from the apple, so the snake always keeps a way
+    out. Otherwise the autopilot follows its tail, and as a last resort takes
+    the move leading to the largest free area.
+
+    act() returns one direction per call, so the autopilot can replace the
+    keyboard or play headless games.
+    """
+
+    def __init__(self):
+        self.path = deque()         # Remaining positions of the cached path to the apple
+        self.apple = None           # Apple the cached path leads to
+        self.searches = 0           # Total number of path searches
+        self.board = None           # (size, cell) the neighbour table was built for
+        self.adjacent = {}          # Cell -> (direction, cell) moves staying inside the board
+
+    def neighbours(self, engine, pos):
+        # Returns the (direction, position) moves from a position that stay inside the board
+        if self.board != (engine.size, engine.cell):
+            # Built once per board size, so the searches only do dictionary lookups
+            width, height = engine.size
+            self.board = (engine.size, engine.cell)
+            self.adjacent = {}
+            for y in range(0, height, engine.cell):
+                for x in range(0, width, engine.cell):
+                    self.adjacent[(x, y)] = tuple((direction, (x + dx, y + dy)) for direction, (dx, dy) in engine.moves.items()
+                                                  if 0 <= x + dx < width and 0 <= y + dy < height)
+        return self.adjacent[pos]
+
+    def search(self, engine, start, goal, occupied, free_tail):
+        """
+        Breadth-first search of the shortest path between two cells.
+
+        Parameters:
+            start (tuple): Cell the search starts from (the head).
+            goal (tuple): Cell to reach.
+            occupied (set): Cells covered by the body.
+            free_tail (tuple): Covered cell the tail leaves on the next move, or None.
+
+        Returns:
+            list: Positions from the first step to the goal, or None if the goal cannot be reached.
+        """
+        self.searches += 1
+        self.neighbours(engine, start)
+        adjacent = self.adjacent
+        parents = {start: None}
+        queue = deque([start])
+        while queue:
+            pos = queue.popleft()
+            for _, move in adjacent[pos]:
+                if move in parents:
+                    continue
+                if move == goal:
+                    path = [move]
+                    while pos != start:
+                        path.append(pos)
+                        pos = parents[pos]
+                    path.reverse()
+                    return path
+                if move in occupied and move != free_tail:
+                    continue
+                parents[move] = pos
+                queue.append(move)
+        return None
+
+    def safe(self, engine, path):
+        # Moves a copy of the body along the path and checks that the tail is still reachable afterwards
+        snake = engine.snake
+        body = deque(snake.body)
+        occupied = set(snake.occupied)
+        pending = snake.pending
+        for pos in path:
+            if pending:
+                pending -= 1
+            else:
+                occupied.discard(body.pop())
+            body.appendleft(pos)
+            occupied.add(pos)
+        # Eating the apple keeps the tail in place for one tick, so it must not be right next to the head
+        way_out = self.search(engine, body[0], body[-1], occupied, None)
+        return way_out is not None and len(way_out) > 1
+
+    def follow_tail(self, engine):
+        # First step of the shortest path to the tail, or None
+        snake = engine.snake
+        if snake.pending:
+            return None  # The tail does not move on the next tick, so it cannot be followed
+        path = self.search(engine, snake.head, snake.body[-1], snake.occupied, None)
+        if path is None or len(path) < 2 and len(snake) > 2:
+            return None
+        return path[0]
+
+    def flood(self, engine, start, occupied, free_tail):
+        # Number of free cells reachable from a cell
+        self.neighbours(engine, start)
+        adjacent = self.adjacent
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            for _, move in adjacent[queue.popleft()]:
+                if move not in seen and (move not in occupied or move == free_tail):
+                    seen.add(move)
+                    queue.append(move)
+        return len(seen)
+
+    def roomiest(self, engine):
+        # Move leading to the largest free area, or the current direction if every move is fatal
+        snake = engine.snake
+        free_tail = None if snake.pending else snake.body[-1]
+        best, best_direction = -1, engine.direction
+        for direction, move in self.neighbours(engine, snake.head):
+            if direction == OPPOSITE[engine.direction] or (move in snake.occupied and move != free_tail):
+                continue
+            area = self.flood(engine, move, snake.occupied, free_tail)
+            if area > best:
+                best, best_direction = area, direction
+        return best_direction
+
+    def direction_to(self, engine, pos):
+        # Direction moving the head onto a neighbouring cell
+        x, y = engine.snake.head
+        for direction, (dx, dy) in engine.moves.items():
+            if (x + dx, y + dy) == pos:
+                return direction
+        return None
+
+    def act(self, engine):
+        """
+        Choose the direction of the next tick.
+
+        Returns:
+            int: UP, DOWN, LEFT or RIGHT, to be passed to engine.step().
+        """
+        snake = engine.snake
+        head = snake.head
+
+        # Keep following the cached path while it still starts next to the head
+        if self.apple != engine.apple_pos or not self.path or self.direction_to(engine, self.path[0]) is None:
+            self.apple = engine.apple_pos
+            free_tail = None if snake.pending else snake.body[-1]
+            path = self.search(engine, head, engine.apple_pos, snake.occupied, free_tail)
+            self.path = deque(path) if path is not None and self.safe(engine, path) else deque()
+
+        if self.path:
+            direction = self.direction_to(engine, self.path.popleft())
+        else:
+            step = self.follow_tail(engine)
+            direction = self.direction_to(engine, step) if step is not None else None
+            if direction is None or direction == OPPOSITE[engine.direction]:
+                direction = self.roomiest(engine)
+        return direction
+
+
+def play(engine, pilot, max_ticks):
+    # Plays a headless game until it ends or ``max_ticks`` ticks have passed
+    step = engine.step
+    act = pilot.act
+    while engine.ticks < max_ticks and step(act(engine)):
+        pass
+
+
+def benchmark(games=1000, cells=20, max_ticks=20000, seed=0):
+    """
+    Play headless games with the autopilot and measure the throughput.
+
+    Parameters:
+        games (int): Number of games to play.
+        cells (int): Width and height of the board, in grid cells.
+        max_ticks (int): Most ticks played per game (the autopilot can chase its tail forever).
+        seed (int): Seed of the first game.
+
+    Returns:
+        tuple: Ticks simulated per second and the average score per game.
+    """
+    ticks = score = 0
+    start = time.perf_counter()
+    for game in range(games):
+        engine = SnakeEngine(size=(cells * 10, cells * 10), cell=10, seed=seed + game)
+        play(engine, SnakeAutopilot(), max_ticks)
+        ticks += engine.ticks
+        score += engine.score
+    return ticks / (time.perf_counter() - start), score / games
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the Snake autopilot on headless games.')
+    parser.add_argument('--games', type=int, default=1000, help='number of games to play')
+    parser.add_argument('--cells', type=int, default=20, help='width and height of the board in cells')
+    parser.add_argument('--max-ticks', type=int, default=20000, help='maximum ticks per game')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    args = parser.parse_args()
+
+    rate, score = benchmark(args.games, args.cells, args.max_ticks, args.seed)
+    print(f"{rate:,.0f} ticks per second, {score:.1f} average score over {args.games} games")
@@ -0,0 +1,316 @@
+# Imports necessary libraries for the compact Snake engine
+import argparse  # Library for parsing the benchmark options
+import random  # Library for placing the apples
+import time  # Library for measuring the benchmark throughput
+from array import array  # Typed arrays holding the body coordinates
+
+from snake_engine import UP, DOWN, LEFT, RIGHT, OPPOSITE
+
+# Largest board side, so every coordinate fits in an unsigned 16-bit array item
+MAX_SIDE = 4096
+
+# Cell movement for each direction, in grid coordinates
+MOVES = {UP: (0, -1), DOWN: (0, 1), LEFT: (-1, 0), RIGHT: (1, 0)}
+
+# Number of free cells in every occupancy byte
+FREE_BITS = bytes(8 - bin(byte).count('1') for byte in range(256))
+
+# Bytes of the occupancy bitset counted at once when sampling a nearly full board
+SAMPLE_BLOCK = 4096
+
+
+class CompactSnakeEngine(object):
+    """
+    Snake engine in grid coordinates for very large boards, with the same rules as SnakeEngine.
+
+    The body is a ring buffer of two array('H') columns (x and y of every
+    segment, 4 bytes per segment) that doubles when the snake outgrows it,
+    and the occupied cells are one bit each in a bytearray. A 4096x4096 board
+    with a 4-million-segment snake fits in about 20 MB, instead of the
+    hundreds of bytes per segment of a deque of tuples plus a set.
+
+    Apples are placed by rejection sampling while the board is mostly free;
+    once it is nearly full a free cell is picked by counting the free bits,
+    a block of 4096 bytes at a time, so only one block is walked in Python.
+
+    Parameters:
+        columns (int): Number of columns of the board (at most MAX_SIDE).
+        rows (int): Number of rows of the board (at most MAX_SIDE).
+        seed (int): Seed for a new random.Random, ignored when ``rng`` is given.
+        rng (random.Random): Random number generator used to place the apples.
+    """
+
+    def __init__(self, columns=60, rows=60, seed=None, rng=None):
+        if not (3 <= columns <= MAX_SIDE and 1 <= rows <= MAX_SIDE):
+            raise ValueError(f'Boards must have 3 to {MAX_SIDE} columns and 1 to {MAX_SIDE} rows')
+        self.columns = columns
+        self.rows = rows
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        # Starts a new game with a three-segment snake heading left from the middle of the board
+        self.occupancy = bytearray((self.columns * self.rows + 7) // 8)  # One bit per cell
+        self.xs = array('H', [0]) * 16  # Ring buffer of segment columns
+        self.ys = array('H', [0]) * 16  # Ring buffer of segment rows
+        self.start = 0                  # Buffer slot of the tail
+        self.length = 0                 # Number of segments
+        x, y = min(self.columns // 2, self.columns - 3), self.rows // 2
+        for i in (2, 1, 0):
+            self.push(x + i, y)
+        self.pending = 0                # Segments still to grow
+        self.direction = LEFT
+        self.score = 0
+        self.ticks = 0
+        self.tail = None                # Cell the tail left on the last tick, or None
+        self.game_over = False
+        self.apple_pos = self.sample()
+
+    @property
+    def head(self):
+        i = (self.start + self.length - 1) % len(self.xs)
+        return self.xs[i], self.ys[i]
+
+    def __len__(self):
+        return self.length
+
+    def occupied(self, x, y):
+        # True if a segment covers the cell
+        i = y * self.columns + x
+        return self.occupancy[i >> 3] >> (i & 7) & 1 == 1
+
+    def push(self, x, y):
+        # Adds a new head, doubling the ring buffer when it is full
+        capacity = len(self.xs)
+        if self.length == capacity:
+            # Unroll the ring so the tail is back at slot 0, then double it
+            self.xs = self.xs[self.start:] + self.xs[:self.start] + array('H', [0]) * capacity
+            self.ys = self.ys[self.start:] + self.ys[:self.start] + array('H', [0]) * capacity
+            self.start = 0
+            capacity *= 2
+        i = (self.start + self.length) % capacity
+        self.xs[i] = x
+        self.ys[i] = y
+        self.length += 1
+        cell = y * self.columns + x
+        self.occupancy[cell >> 3] |= 1 << (cell & 7)
+
+    def pop(self):
+        # Removes the tail and returns its cell
+        x, y = self.xs[self.start], self.ys[self.start]
+        self.start = (self.start + 1) % len(self.xs)
+        self.length -= 1
+        cell = y * self.columns + x
+        self.occupancy[cell >> 3] &= ~(1 << (cell & 7)) & 0xFF
+        return x, y
+
+    def body(self):
+        # Yields the segments from the head to the tail
+        xs, ys, capacity = self.xs, self.ys, len(self.xs)
+        for k in range(self.length - 1, -1, -1):
+            i = (self.start + k) % capacity
+            yield xs[i], ys[i]
+
+    def sample(self):
+        """
+        Pick a free cell uniformly at random.
+
+        Returns:
+            tuple: A free (x, y) cell, or None if the snake covers the whole board.
+        """
+        cells = self.columns * self.rows
+        free = cells - self.length
+        if free <= 0:
+            return None
+        randrange = self.rng.randrange
+        if free * 8 >= cells:
+            # At least one cell in eight is free: a few random tries are enough
+            for _ in range(64):
+                i = randrange(cells)
+                if not self.occupancy[i >> 3] >> (i & 7) & 1:
+                    return i % self.columns, i // self.columns
+        # Nearly full board: pick the k-th free cell. Whole blocks of the bitset are skipped by
+        # counting their set bits in C, so the Python loop only walks the bytes of a single block.
+        # Padding bits past the last cell are never occupied, but they come after every real free
+        # cell and k < free, so they are never picked.
+        k = randrange(free)
+        occupancy = self.occupancy
+        for first in range(0, len(occupancy), SAMPLE_BLOCK):
+            block = occupancy[first:first + SAMPLE_BLOCK]
+            count = 8 * len(block) - int.from_bytes(block, 'little').bit_count()
+            if k < count:
+                break
+            k -= count
+        free_bits = FREE_BITS
+        for index, byte in enumerate(block, first):
+            count = free_bits[byte]
+            if k < count:
+                for bit in range(8):
+                    if not byte >> bit & 1:
+                        if k == 0:
+                            i = index << 3 | bit
+                            return i % self.columns, i // self.columns
+                        k -= 1
+            k -= count
+        return None
+
+    def turn(self, direction):
+        """
+        Change the direction of the snake, unless it is directly opposite to the current one.
+
+        Returns:
+            bool: True if the direction was accepted.
+        """
+        if direction == OPPOSITE[self.direction]:
+            return False
+        self.direction = direction
+        return True
+
+    def step(self, direction=None):
+        """
+        Advance the game by one tick.
+
+        Parameters:
+            direction (int): Optional UP, DOWN, LEFT or RIGHT to turn to before moving.
+
+        Returns:
+            bool: False once the game is over (the snake hit a wall or itself, or filled the board).
+        """
+        if self.game_over:
+            return False
+        if direction is not None:
+            self.turn(direction)
+
+        x, y = self.head
+        dx, dy = MOVES[self.direction]
+        x += dx
+        y += dy
+        self.ticks += 1
+
+        # Screen limits end the game.
+        if not (0 <= x < self.columns and 0 <= y < self.rows):
+            self.game_over = True
+            return False
+
+        # Pop the tail first: moving into the cell it just left is allowed.
+        if self.pending:
+            self.pending -= 1
+            self.tail = None
+        else:
+            self.tail = self.pop()
+
+        # Self collision ends the game.
+        if self.occupied(x, y):
+            self.game_over = True
+            return False
+        self.push(x, y)
+
+        # Eating the apple grows the snake on the next move.
+        if (x, y) == self.apple_pos:
+            self.pending += 1
+            self.score += 1
+            self.apple_pos = self.sample()
+            if self.apple_pos is None:  # The snake covers the whole board: nothing left to eat.
+                self.game_over = True
+                return False
+        return True
+
+    def nbytes(self):
+        # Memory used by the body buffers and the occupancy bitset
+        return (len(self.xs) + len(self.ys)) * self.xs.itemsize + len(self.occupancy)
+
+    def viewport(self, left, top, width, height):
+        """
+        Cells of a rectangular window of the board that are covered by the snake.
+
+        Only the occupancy bits of the window are read, so the cost depends on
+        the size of the viewport, not on the length of the snake.
+
+        Returns:
+            list: Covered (x, y) cells inside the window.
+        """
+        cells = []
+        columns = self.columns
+        occupancy = self.occupancy
+        for y in range(max(0, top), min(self.rows, top + height)):
+            row = y * columns
+            for x in range(max(0, left), min(columns, left + width)):
+                i = row + x
+                if occupancy[i >> 3] >> (i & 7) & 1:
+                    cells.append((x, y))
+        return cells
+
+
+def draw_viewport(surface, engine, left, top, cell_size=10):
+    """
+    Draw the part of the board starting at cell (left, top) that fits on a surface.
+
+    Parameters:
+        surface (pygame.Surface): Surface to draw on.
+        engine (CompactSnakeEngine): Game to draw.
+        left (int): Column of the board drawn at the left edge of the surface.
+        top (int): Row of the board drawn at the top edge of the surface.
+        cell_size (int): Size of a cell on screen, in pixels.
+    """
+    width = surface.get_width() // cell_size
+    height = surface.get_height() // cell_size
+    surface.fill((0, 0, 0))
+    for x, y in engine.viewport(left, top, width, height):
+        surface.fill((0, 255, 0), ((x - left) * cell_size, (y - top) * cell_size, cell_size, cell_size))
+    if engine.apple_pos is not None:
+        x, y = engine.apple_pos
+        if left <= x < left + width and top <= y < top + height:
+            surface.fill((255, 0, 0), ((x - left) * cell_size, (y - top) * cell_size, cell_size, cell_size))
+
+
+def serpentine(engine, length):
+    """
+    Grow the snake to ``length`` segments by sweeping the board row by row.
+
+    A new game is first moved to the right end of the top row, heading left,
+    so the sweep covers every cell of the board.
+
+    Raises:
+        ValueError: If ``length`` is more than the board holds.
+        RuntimeError: If the game ends before the snake reaches ``length``.
+
+    Returns:
+        float: Ticks per second.
+    """
+    if length > engine.columns * engine.rows:
+        raise ValueError(f'A {engine.columns}x{engine.rows} board holds at most {engine.columns * engine.rows:,} segments')
+    if engine.ticks == 0:
+        while len(engine):
+            engine.pop()
+        for x in (1, 2, 3):
+            engine.push(engine.columns - x, 0)
+        engine.direction = LEFT
+        engine.apple_pos = engine.sample()
+    engine.pending = length - len(engine)
+    start = time.perf_counter()
+    ticks = engine.ticks
+    while len(engine) < length and not engine.game_over:
+        x, y = engine.head
+        heading = RIGHT if y % 2 else LEFT
+        if (heading == LEFT and x == 0) or (heading == RIGHT and x == engine.columns - 1):
+            engine.step(DOWN)   # End of the row: drop to the next one and turn around
+        else:
+            engine.step(heading)
+    rate = (engine.ticks - ticks) / (time.perf_counter() - start)
+    if len(engine) < length:
+        raise RuntimeError(f'Game over after {engine.ticks:,} ticks with {len(engine):,} of {length:,} segments')
+    return rate
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Grow a very long snake on a large board and report speed and memory.')
+    parser.add_argument('--columns', type=int, default=MAX_SIDE, help='number of columns of the board')
+    parser.add_argument('--rows', type=int, default=MAX_SIDE, help='number of rows of the board')
+    parser.add_argument('--length', type=int, default=2000000, help='number of segments to grow the snake to')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the apples')
+    args = parser.parse_args()
+
+    engine = CompactSnakeEngine(args.columns, args.rows, seed=args.seed)
+    rate = serpentine(engine, args.length)
+    print(f"{len(engine):,} segments on {args.columns}x{args.rows}: {rate:,.0f} ticks per second, "
+          f"{engine.nbytes() / 2 ** 20:.1f} MB of game state")
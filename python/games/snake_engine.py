@@ -0,0 +1,289 @@
+# Imports necessary libraries for the headless Snake engine
+import random  # Library for placing the apples
+from collections import deque  # Double-ended queue holding the snake body
+
+
+# Setting Up Constants
+WINDOW_SIZE = (600, 600)
+PIXEL_SIZE = 10
+
+
+# Helper Functions
+
+# Collision detection function
+def collision(pos1, pos2):
+    """
+    Check if two positions are colliding.
+
+    Parameters:
+        pos1 (tuple): Position of the first object.
+        pos2 (tuple): Position of the second object.
+
+    Returns:
+        bool: True if the positions are equal (colliding), False otherwise.
+    """
+    return pos1 == pos2  # Returns True if the positions are equal, indicating a collision.
+
+
+# Boundary Check function
+def off_limits(pos, size=WINDOW_SIZE):
+    """
+    Check if a position is within the boundaries of the game window.
+
+    Parameters:
+        pos (tuple): Position to check.
+        size (tuple): Width and height of the window.
+
+    Returns:
+        bool: True if the position is off the limits, False if within the limits.
+    """
+    if 0 <= pos[0] < size[0] and 0 <= pos[1] < size[1]:  # Check if the position is within the window bounds.
+        return False  # Position is within the limits.
+    else:
+        return True  # Position is off the limits.
+
+
+
+# Generate a random position for the apple function
+def random_on_grid():
+    """
+    Generate a random position within the grid for the apple.
+
+    Returns:
+        tuple: Random position within the grid, aligned to the grid cell size.
+    """
+    x = random.randint(0, WINDOW_SIZE[0] - PIXEL_SIZE)  # Generate a random x-coordinate within the grid.
+    y = random.randint(0, WINDOW_SIZE[1] - PIXEL_SIZE)  # Generate a random y-coordinate within the grid.
+    return x // PIXEL_SIZE * PIXEL_SIZE, y // PIXEL_SIZE * PIXEL_SIZE  # Align the coordinates to the grid cell size and return as a tuple.
+
+
+
+# Generate every position of the grid
+def grid_cells(size=WINDOW_SIZE, cell=PIXEL_SIZE):
+    """
+    List every position of the grid, aligned to the grid cell size.
+
+    Parameters:
+        size (tuple): Width and height of the window.
+        cell (int): Size of a grid cell.
+
+    Returns:
+        list: All (x, y) positions of the grid.
+    """
+    return [(x, y) for y in range(0, size[1], cell) for x in range(0, size[0], cell)]
+
+
+
+# Free cell index
+class FreeCells(object):
+    """
+    Set of the grid positions not covered by the snake, supporting O(1) random sampling.
+
+    The positions are kept in a list with a map from position to list index;
+    removing swaps the last position into the freed slot, so adding, removing
+    and sampling are all constant time, even with 99% of the board covered.
+
+    Parameters:
+        cells (iterable): Initially free positions.
+    """
+
+    def __init__(self, cells):
+        self.cells = list(cells)  # Free positions, in no particular order.
+        self.index = {cell: i for i, cell in enumerate(self.cells)}  # Position -> index in self.cells.
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.index
+
+    def add(self, cell):
+        # Marks a position as free (no-op if it already is).
+        if cell not in self.index:
+            self.index[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        # Marks a position as covered (no-op if it is not free), swapping the last position into its slot.
+        i = self.index.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.index[last] = i
+
+    def sample(self, rng=random):
+        """
+        Pick a free position uniformly at random.
+
+        Parameters:
+            rng (random.Random): Random number generator to use.
+
+        Returns:
+            tuple: A free position, or None if the snake covers the whole grid.
+        """
+        return rng.choice(self.cells) if self.cells else None
+
+
+
+# Snake model
+class Snake(object):
+    """
+    Snake body stored as a deque of positions (head first) plus a set of the occupied positions.
+
+    Moving pushes the new head and pops the tail, and self-collision is a
+    single set lookup, so a tick costs the same for 3 segments or 300,000.
+
+    Parameters:
+        positions (list): Initial positions of the segments, head first.
+    """
+
+    def __init__(self, positions):
+        self.body = deque(positions)  # Segment positions, head on the left.
+        self.occupied = set(positions)  # Positions covered by the body.
+        self.pending = 0  # Segments still to grow, added by not popping the tail.
+        self.collided = False  # True if the last move ran the head into the body.
+
+    @property
+    def head(self):
+        return self.body[0]
+
+    def __len__(self):
+        return len(self.body)
+
+    def grow(self):
+        # The tail stays in place on the next move, making the snake one segment longer.
+        self.pending += 1
+
+    def move(self, dx, dy):
+        """
+        Move the head by (dx, dy), dragging the body along.
+
+        Returns:
+            tuple: The position of the tail that was freed, or None if the snake grew.
+        """
+        x, y = self.body[0]
+        head = (x + dx, y + dy)
+        tail = None
+        if self.pending:
+            self.pending -= 1
+        else:
+            tail = self.body.pop()
+            self.occupied.discard(tail)
+        self.collided = head in self.occupied  # Moving into the cell the tail just left is allowed.
+        self.body.appendleft(head)
+        self.occupied.add(head)
+        return tail
+
+
+
+# Directions understood by SnakeEngine.step(), matching the arrow keys handled by the pygame front end
+UP = 0
+DOWN = 1
+LEFT = 2
+RIGHT = 3
+OPPOSITE = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}  # Reversing into the body is not allowed.
+
+# Initial position of the snake on the default window, head first
+START_POS = [(250, 50), (260, 50), (270, 50)]
+
+
+def start_positions(size=WINDOW_SIZE, cell=PIXEL_SIZE):
+    """
+    Initial positions of a snake heading left, head first.
+
+    Returns:
+        list: START_POS on the default window, three cells in the middle of any other board.
+    """
+    if size == WINDOW_SIZE and cell == PIXEL_SIZE:
+        return list(START_POS)
+    x = size[0] // 2 // cell * cell
+    y = size[1] // 2 // cell * cell
+    return [(x, y), (x + cell, y), (x + 2 * cell, y)]
+
+
+# Snake engine
+class SnakeEngine(object):
+    """
+    Headless Snake game with the same rules as the pygame front end, driven one tick at a time.
+
+    The engine never touches pygame, so it can be imported by tools, tests
+    and bots and run as fast as the CPU allows. Apples are placed with an
+    injectable random.Random, so two engines with the same seed and the same
+    inputs play out identically.
+
+    Parameters:
+        size (tuple): Width and height of the board, in pixels.
+        cell (int): Size of a grid cell, in pixels.
+        seed (int): Seed for a new random.Random, ignored when ``rng`` is given.
+        rng (random.Random): Random number generator used to place the apples.
+    """
+
+    def __init__(self, size=WINDOW_SIZE, cell=PIXEL_SIZE, seed=None, rng=None):
+        self.size = size
+        self.cell = cell
+        self.moves = {UP: (0, -cell), DOWN: (0, cell), LEFT: (-cell, 0), RIGHT: (cell, 0)}  # Head movement for each direction.
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        # Starts a new game.
+        self.snake = Snake(start_positions(self.size, self.cell))
+        self.free_cells = FreeCells(pos for pos in grid_cells(self.size, self.cell) if pos not in self.snake.occupied)
+        self.direction = LEFT  # Initial direction of the snake is left.
+        self.apple_pos = self.free_cells.sample(self.rng)
+        self.score = 0
+        self.ticks = 0
+        self.tail = None  # Position the tail left on the last tick, or None.
+        self.game_over = False
+
+    def turn(self, direction):
+        """
+        Change the direction of the snake, unless it is directly opposite to the current one.
+
+        Returns:
+            bool: True if the direction was accepted.
+        """
+        if direction == OPPOSITE[self.direction]:
+            return False
+        self.direction = direction
+        return True
+
+    def step(self, direction=None):
+        """
+        Advance the game by one tick.
+
+        Parameters:
+            direction (int): Optional UP, DOWN, LEFT or RIGHT to turn to before moving.
+
+        Returns:
+            bool: False once the game is over (the snake hit a wall or itself, or filled the board).
+        """
+        if self.game_over:
+            return False
+        if direction is not None:
+            self.turn(direction)
+
+        # Move: push the new head and pop the tail.
+        snake = self.snake
+        self.tail = snake.move(*self.moves[self.direction])
+        if self.tail is not None:
+            self.free_cells.add(self.tail)  # The cell the tail left is free again (before the head may take it).
+        self.free_cells.discard(snake.head)  # The cell the head entered is now covered.
+        self.ticks += 1
+
+        # Self collision and screen limits end the game.
+        if snake.collided or off_limits(snake.head, self.size):
+            self.game_over = True
+            return False
+
+        # Eating the apple grows the snake on the next move.
+        if collision(self.apple_pos, snake.head):
+            snake.grow()
+            self.score += 1
+            self.apple_pos = self.free_cells.sample(self.rng)
+            if self.apple_pos is None:  # The snake covers the whole grid: nothing left to eat.
+                self.game_over = True
+                return False
+        return True
@@ -0,0 +1,507 @@
+# Imports necessary libraries for the multiplayer Snake server
+import argparse  # Library for parsing the command line options
+import asyncio  # Library for the event loop serving every client
+import random  # Library for placing the snakes and the apples
+import struct  # Library for packing the binary messages
+import time  # Library for measuring the tick timings
+from collections import Counter  # Counts the snakes entering each cell, to find head-on collisions
+
+from snake_engine import PIXEL_SIZE, UP, DOWN, LEFT, RIGHT, OPPOSITE, collision, off_limits, Snake
+
+# Server message types (first byte of every message)
+SNAPSHOT = 0
+DELTA = 1
+
+# Every server message is prefixed with its length
+LENGTH = struct.Struct('<I')
+
+# Message headers: type, tick, then the snapshot's player id and board size or the delta's section sizes
+SNAPSHOT_HEADER = struct.Struct('<BIHHHHH')    # type, tick, your id, columns, rows, snakes, apples
+DELTA_HEADER = struct.Struct('<BIHHH')         # type, tick, heads, tails, apples
+SNAKE_HEADER = struct.Struct('<HI')            # snake id, number of cells
+
+# Clients send one byte per input: the UP, DOWN, LEFT or RIGHT direction to turn to
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+# Bytes a slow client may have queued before it is dropped
+MAX_BUFFER = 1 << 20
+
+
+def pack_cells(cells):
+    # Packs a flat list of unsigned 16-bit values
+    return struct.pack(f'<{len(cells)}H', *cells)
+
+
+def encode_delta(tick, heads, tails, apples):
+    """
+    Encode the changes of one tick.
+
+    Parameters:
+        tick (int): Tick number.
+        heads (list): Flat (player id, x, y) triples of the cells covered this tick (moves and spawns).
+        tails (list): Flat (x, y) pairs of the cells freed this tick (tails and dead snakes).
+        apples (list): Flat (apple index, x, y) triples of the apples placed this tick.
+
+    Returns:
+        bytes: The DELTA message, without its length prefix.
+    """
+    return (DELTA_HEADER.pack(DELTA, tick, len(heads) // 3, len(tails) // 2, len(apples) // 3)
+            + pack_cells(heads) + pack_cells(tails) + pack_cells(apples))
+
+
+def decode(message):
+    """
+    Decode a server message.
+
+    Returns:
+        tuple: ``(DELTA, tick, heads, tails, apples)`` with flat lists as in encode_delta(), or
+            ``(SNAPSHOT, tick, player_id, columns, rows, snakes, apples)`` with snakes as
+            {id: flat (x, y) list, head first} and apples as a flat (apple index, x, y) list.
+    """
+    if message[0] == DELTA:
+        _, tick, heads, tails, apples = DELTA_HEADER.unpack_from(message)
+        values = struct.unpack_from(f'<{3 * heads + 2 * tails + 3 * apples}H', message, DELTA_HEADER.size)
+        return (DELTA, tick, list(values[:3 * heads]), list(values[3 * heads:3 * heads + 2 * tails]),
+                list(values[3 * heads + 2 * tails:]))
+
+    _, tick, player_id, columns, rows, count, apples = SNAPSHOT_HEADER.unpack_from(message)
+    pos = SNAPSHOT_HEADER.size
+    snakes = {}
+    for _ in range(count):
+        snake_id, length = SNAKE_HEADER.unpack_from(message, pos)
+        pos += SNAKE_HEADER.size
+        snakes[snake_id] = list(struct.unpack_from(f'<{2 * length}H', message, pos))
+        pos += 4 * length
+    return SNAPSHOT, tick, player_id, columns, rows, snakes, list(struct.unpack_from(f'<{3 * apples}H', message, pos))
+
+
+class Player(object):
+    # One connected player: its snake, its direction and the direction it asked for
+
+    __slots__ = ('id', 'snake', 'direction', 'next_direction', 'score', 'writer')
+
+    def __init__(self, player_id, writer=None):
+        self.id = player_id
+        self.snake = None
+        self.direction = LEFT
+        self.next_direction = None
+        self.score = 0
+        self.writer = writer
+
+
+class SnakeMatch(object):
+    """
+    Shared Snake board for many players, with the rules of the single player game.
+
+    All the snakes move at once every tick: tails are freed first, then the
+    new heads are checked with off_limits() against the walls and against
+    every body on the board, and two heads entering the same cell both die.
+    Dead snakes are removed and respawn as a single cell that grows over the
+    next two moves. Eating an apple (collision() with a head) grows the snake
+    and moves the apple.
+
+    tick() returns the changes as a compact binary delta; snapshot() encodes
+    the whole board for players joining a running match.
+
+    Parameters:
+        size (tuple): Width and height of the board, in pixels.
+        cell (int): Size of a grid cell, in pixels.
+        apples (int): Number of apples on the board.
+        seed (int): Seed of the random generator placing the snakes and apples.
+    """
+
+    def __init__(self, size=(1200, 1200), cell=PIXEL_SIZE, apples=32, seed=None):
+        self.size = size
+        self.cell = cell
+        self.moves = {UP: (0, -cell), DOWN: (0, cell), LEFT: (-cell, 0), RIGHT: (cell, 0)}
+        self.rng = random.Random(seed)
+        self.players = {}
+        self.board = {}         # Covered position -> id of the player covering it
+        self.next_id = 0
+        self.tick_count = 0
+        self.heads = []         # Changes waiting for the next delta (see encode_delta)
+        self.tails = []
+        self.placed = []
+        self.apples = [None] * apples
+        for i in range(apples):
+            self.place_apple(i)
+
+    def cell_of(self, pos):
+        return pos[0] // self.cell, pos[1] // self.cell
+
+    def free_position(self):
+        # Random position not covered by a snake or an apple (rejection sampling, the board is mostly free)
+        columns, rows = self.size[0] // self.cell, self.size[1] // self.cell
+        for _ in range(1000):
+            pos = (self.rng.randrange(columns) * self.cell, self.rng.randrange(rows) * self.cell)
+            if pos not in self.board and pos not in self.apples:
+                return pos
+        return None
+
+    def place_apple(self, i):
+        # Moves apple ``i`` to a free position
+        pos = self.free_position()
+        self.apples[i] = pos
+        if pos is not None:
+            self.placed.extend((i, *self.cell_of(pos)))
+
+    def spawn(self, player):
+        # Starts a new single-cell snake for the player, growing over its next two moves
+        pos = self.free_position()
+        if pos is None:
+            player.snake = None
+            return
+        player.snake = Snake([pos])
+        player.snake.pending = 2
+        player.direction = self.rng.choice(DIRECTIONS)
+        player.next_direction = None
+        self.board[pos] = player.id
+        self.heads.extend((player.id, *self.cell_of(pos)))
+
+    def add_player(self, writer=None):
+        """
+        Create a player and spawn its snake.
+
+        Ids are 16-bit and handed out in turn, skipping the ids of players
+        still connected after they wrap around.
+
+        Raises:
+            RuntimeError: If all 65536 ids are in use.
+
+        Returns:
+            Player: The new player.
+        """
+        if len(self.players) > 0xFFFF:
+            raise RuntimeError('The match is full: every player id is in use')
+        while self.next_id in self.players:
+            self.next_id = (self.next_id + 1) & 0xFFFF
+        player = Player(self.next_id, writer)
+        self.next_id = (self.next_id + 1) & 0xFFFF
+        self.players[player.id] = player
+        self.spawn(player)
+        return player
+
+    def remove(self, player):
+        # Removes the snake of a player from the board
+        if player.snake is None:
+            return
+        for pos in player.snake.body:
+            del self.board[pos]
+            self.tails.extend(self.cell_of(pos))
+        player.snake = None
+
+    def remove_player(self, player):
+        self.remove(player)
+        self.players.pop(player.id, None)
+
+    def tick(self):
+        """
+        Move every snake one cell and resolve the collisions and apples.
+
+        Returns:
+            bytes: The DELTA message of this tick.
+        """
+        board = self.board
+        moving = []
+
+        # Turn and free the tails first: a snake may move into a cell a tail just left
+        for player in self.players.values():
+            snake = player.snake
+            if snake is None:
+                self.spawn(player)  # Board was full when the player died or joined
+                continue
+            if player.next_direction is not None and player.next_direction != OPPOSITE[player.direction]:
+                player.direction = player.next_direction
+            player.next_direction = None
+            dx, dy = self.moves[player.direction]
+            x, y = snake.head
+            if snake.pending:
+                snake.pending -= 1
+            else:
+                tail = snake.body.pop()
+                snake.occupied.discard(tail)
+                del board[tail]
+                self.tails.extend(self.cell_of(tail))
+            moving.append((player, (x + dx, y + dy)))
+
+        # Walls, bodies and other heads entering the same cell kill the snake
+        entering = Counter(head for _, head in moving)
+        dead = []
+        for player, head in moving:
+            if off_limits(head, self.size) or head in board or entering[head] > 1:
+                dead.append(player)
+                continue
+            snake = player.snake
+            snake.body.appendleft(head)
+            snake.occupied.add(head)
+            board[head] = player.id
+            self.heads.extend((player.id, *self.cell_of(head)))
+
+        for player in dead:
+            self.remove(player)
+            player.score = 0
+            self.spawn(player)
+
+        # Heads on an apple grow their snake and move the apple
+        if self.players:
+            for i, apple in enumerate(self.apples):
+                if apple is None:
+                    self.place_apple(i)
+                    continue
+                owner = board.get(apple)
+                if owner is not None:
+                    player = self.players[owner]
+                    if collision(apple, player.snake.head):
+                        player.snake.grow()
+                        player.score += 1
+                        self.place_apple(i)
+
+        self.tick_count += 1
+        delta = encode_delta(self.tick_count, self.heads, self.tails, self.placed)
+        self.heads, self.tails, self.placed = [], [], []
+        return delta
+
+    def snapshot(self, player_id):
+        """
+        Encode the whole board for a player joining the match.
+
+        Returns:
+            bytes: The SNAPSHOT message, without its length prefix.
+        """
+        parts = []
+        snakes = 0
+        for player in self.players.values():
+            if player.snake is None:
+                continue
+            cells = []
+            for pos in player.snake.body:
+                cells.extend(self.cell_of(pos))
+            parts.append(SNAKE_HEADER.pack(player.id, len(player.snake)) + pack_cells(cells))
+            snakes += 1
+        apples = []
+        for i, pos in enumerate(self.apples):
+            if pos is not None:
+                apples.extend((i, *self.cell_of(pos)))
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT, self.tick_count, player_id, self.size[0] // self.cell,
+                                      self.size[1] // self.cell, snakes, len(apples) // 3)
+        return header + b''.join(parts) + pack_cells(apples)
+
+
+class SnakeServer(object):
+    """
+    Authoritative asyncio TCP server running a SnakeMatch at a fixed tick rate.
+
+    Clients receive a SNAPSHOT when they connect, then one DELTA per tick,
+    every message prefixed with its length as a little-endian uint32. They
+    send one byte per input, the direction to turn to; the last input received
+    before a tick is applied. The delta is encoded once and the same bytes are
+    written to every client; clients falling more than MAX_BUFFER bytes behind
+    are dropped instead of slowing the tick loop down.
+
+    Parameters:
+        match (SnakeMatch): Board to run.
+        hz (float): Ticks per second.
+    """
+
+    def __init__(self, match, hz=20):
+        self.match = match
+        self.period = 1.0 / hz
+        self.server = None
+        self.jitter = []            # Lateness of every tick, in seconds
+        self.tick_times = []        # Time spent simulating and broadcasting every tick, in seconds
+        self.payloads = []          # Size of every delta, in bytes
+        self.sent = []              # Bytes written to all the clients on every tick
+
+    async def start(self, host='127.0.0.1', port=0, backlog=1024):
+        # Starts listening, returning the port (useful with port 0)
+        self.server = await asyncio.start_server(self.handle_client, host, port, backlog=backlog)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle_client(self, reader, writer):
+        # Adds a player for the connection and applies its inputs until it disconnects
+        try:
+            player = self.match.add_player(writer)
+        except RuntimeError:
+            writer.close()  # No id left: turn the connection away
+            return
+        snapshot = self.match.snapshot(player.id)
+        writer.write(LENGTH.pack(len(snapshot)) + snapshot)
+        try:
+            while True:
+                data = await reader.read(64)
+                if not data:
+                    break
+                direction = data[-1]  # Only the latest input of a burst matters
+                if direction in DIRECTIONS:
+                    player.next_direction = direction
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.match.remove_player(player)
+            writer.close()
+
+    def broadcast(self, delta):
+        # Writes one delta to every client, dropping those that cannot keep up
+        message = LENGTH.pack(len(delta)) + delta
+        sent = 0
+        for player in list(self.match.players.values()):
+            writer = player.writer
+            if writer is None:
+                continue
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_BUFFER:
+                self.match.remove_player(player)
+                writer.close()
+                continue
+            writer.write(message)
+            sent += len(message)
+        return sent
+
+    async def run(self, ticks=None):
+        # Runs the tick loop, for ``ticks`` ticks or forever
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        count = 0
+        while ticks is None or count < ticks:
+            deadline += self.period
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)  # Let the clients run even when behind schedule
+            now = loop.time()
+            self.jitter.append(now - deadline)
+            if now - deadline > self.period:
+                deadline = now  # Drop the backlog rather than bursting ticks to catch up
+            start = time.perf_counter()
+            delta = self.match.tick()
+            self.sent.append(self.broadcast(delta))
+            self.tick_times.append(time.perf_counter() - start)
+            self.payloads.append(len(delta))
+            count += 1
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+
+async def read_message(reader):
+    # Reads one length-prefixed server message
+    header = await reader.readexactly(LENGTH.size)
+    return await reader.readexactly(LENGTH.unpack(header)[0])
+
+
+def find_head(message, player_id, head=None):
+    # Position of a player's head in a delta, found with bytes.find instead of decoding every entry
+    key = struct.pack('<H', player_id)
+    end = DELTA_HEADER.size + 6 * DELTA_HEADER.unpack_from(message)[2]
+    pos = message.find(key, DELTA_HEADER.size, end)
+    while pos != -1:
+        if (pos - DELTA_HEADER.size) % 6 == 0:  # Ignore matches inside the coordinates
+            head = struct.unpack_from('<HH', message, pos + 2)
+        pos = message.find(key, pos + 1, end)
+    return head
+
+
+async def bot_client(host, port, seed=None):
+    """
+    In-process client steering its snake away from the walls, with random turns.
+
+    It follows its own head from the deltas and sends a direction whenever it
+    decides to turn, so it exercises the same protocol as a real client.
+
+    Returns:
+        int: Number of bytes received before the connection closed.
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    received = 0
+    try:
+        message = await read_message(reader)
+        received += len(message) + LENGTH.size
+        _, _, player_id, columns, rows, snakes, _ = decode(message)
+        head = tuple(snakes[player_id][:2]) if player_id in snakes else None
+        steps = {UP: (0, -1), DOWN: (0, 1), LEFT: (-1, 0), RIGHT: (1, 0)}
+        direction = None
+        while True:
+            message = await read_message(reader)
+            received += len(message) + LENGTH.size
+            head = find_head(message, player_id, head)
+            if head is None:
+                continue
+
+            # Turn when the next cell is a wall, and sometimes at random
+            choices = [d for d, (dx, dy) in steps.items()
+                       if 0 <= head[0] + dx < columns and 0 <= head[1] + dy < rows and d != OPPOSITE.get(direction)]
+            if direction is None or direction not in choices or rng.random() < 0.1:
+                direction = rng.choice(choices)
+                writer.write(bytes((direction,)))
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+    return received
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+
+async def load_test(clients=200, seconds=10, hz=20, size=(1200, 1200), seed=0):
+    """
+    Run a server with in-process bot clients and measure the tick loop.
+
+    Returns:
+        dict: Tick jitter and simulation time percentiles in milliseconds, and bytes per tick.
+    """
+    server = SnakeServer(SnakeMatch(size, seed=seed), hz)
+    port = await server.start()
+    bots = [asyncio.create_task(bot_client('127.0.0.1', port, seed + i)) for i in range(clients)]
+    while len(server.match.players) < clients:
+        if any(bot.done() for bot in bots):
+            await asyncio.gather(*bots)  # Raises the connection error of the bot that failed
+        await asyncio.sleep(0.01)
+    await server.run(int(seconds * hz))
+    server.close()
+    for writer in [player.writer for player in server.match.players.values()]:
+        writer.close()
+    received = await asyncio.gather(*bots)
+
+    ms = 1000.0
+    return {
+        'clients': clients,
+        'ticks': len(server.jitter),
+        'jitter_p50_ms': percentile(server.jitter, 0.50) * ms,
+        'jitter_p99_ms': percentile(server.jitter, 0.99) * ms,
+        'jitter_max_ms': max(server.jitter) * ms,
+        'tick_p50_ms': percentile(server.tick_times, 0.50) * ms,
+        'tick_p99_ms': percentile(server.tick_times, 0.99) * ms,
+        'delta_bytes_per_tick': sum(server.payloads) / len(server.payloads),
+        'sent_bytes_per_tick': sum(server.sent) / len(server.sent),
+        'received_bytes_per_client': sum(received) / clients,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run a multiplayer Snake server, or load test one with bot clients.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=9000, help='port to listen on')
+    parser.add_argument('--hz', type=float, default=20, help='ticks per second')
+    parser.add_argument('--size', type=int, nargs=2, default=(1200, 1200), metavar=('WIDTH', 'HEIGHT'),
+                        help='board size in pixels')
+    parser.add_argument('--load-test', type=int, metavar='CLIENTS', help='run a load test with this many bot clients')
+    parser.add_argument('--seconds', type=float, default=10, help='length of the load test')
+    args = parser.parse_args()
+
+    if args.load_test:
+        results = asyncio.run(load_test(args.load_test, args.seconds, args.hz, tuple(args.size)))
+        for key, value in results.items():
+            print(f"{key:<26} {value:,.2f}" if isinstance(value, float) else f"{key:<26} {value:,}")
+    else:
+        async def serve():
+            server = SnakeServer(SnakeMatch(tuple(args.size)), args.hz)
+            port = await server.start(args.host, args.port)
+            print(f"Snake server on {args.host}:{port} at {args.hz:g} Hz")
+            await server.run()
+
+        asyncio.run(serve())
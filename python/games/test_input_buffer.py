@@ -0,0 +1,52 @@
+import pytest
+
+from input_buffer import AutoRepeat, InputBuffer, TurnBuffer
+from snake_engine import UP, LEFT, RIGHT, OPPOSITE
+
+
+class FakeClock(object):
+    # Clock the test moves by hand, in seconds.
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_press_during_the_wait_reports_up_to_one_tick():
+    clock = FakeClock()
+    turns = TurnBuffer(clock=clock)
+    tick = 1 / 15
+    polled = clock()                # End of the event poll of one frame.
+    clock.now += tick / 2           # The key goes down halfway through the wait for the next frame...
+    clock.now += tick / 2           # ...and is read by the poll of that frame.
+    turns.push(UP, polled)
+    assert turns.next_turn(RIGHT, OPPOSITE) == UP
+    assert turns.latency() is None  # Not on screen yet.
+    clock.now += 0.002              # Step, draw and display update.
+    turns.shown()
+    assert turns.latency() == pytest.approx((tick * 1000 + 2,) * 3)
+
+
+def test_auto_repeat_latency_is_recorded_when_shown():
+    clock = FakeClock()
+    inputs = AutoRepeat(das_ms=100, arr_ms=50, clock=clock)
+    polled = clock()
+    clock.now = 0.016
+    inputs.press('left', LEFT, timestamp=polled)
+    assert inputs.actions() == [LEFT]
+    clock.now = 0.017
+    inputs.shown()
+    assert list(inputs.latencies) == pytest.approx([0.017])
+    clock.now = 0.130               # One repeat due at 0.100 (DAS), 30 ms before this frame.
+    assert inputs.actions() == [LEFT]
+    inputs.shown()
+    assert list(inputs.latencies) == pytest.approx([0.017, 0.030])
+
+
+def test_full_queue_drops_inputs():
+    buffer = InputBuffer(maxlen=2, clock=FakeClock())
+    assert buffer.push(1) and buffer.push(2)
+    assert not buffer.push(3)
+    assert buffer.dropped == 1
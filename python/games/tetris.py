@@ -1,9 +1,17 @@
 # Imports necessary libraries for the game
-import pygame  # Library for creating games in Python
+import argparse  # Library for parsing the command line options
 import random  # Library for generating random numbers
+import pygame  # Library for creating games in Python
 
-# Initializes Pygame for usage
-pygame.init()
+# Game rules, shapes and the board live in the pygame-free engine module
+from tetris_engine import (TICK_MS, LEFT, RIGHT, DOWN, ROTATE, S, Z, I, O, J, L, T, shapes, shape_colors, shape_cells,
+                           Piece, Board, TetrisEngine, create_grid, convert_shape_format, valid_space,
+                           check_lost, get_shape, clear_rows)
+from game_loop import FixedTimestep
+from tetris_bot import TetrisBot
+from tetris_replay import Replay, ReplayRecorder
+from profiler import FrameProfiler
+from input_buffer import AutoRepeat
 
 # Defines the screen dimensions for the game
 s_width = 800           # Width of the main game screen
@@ -20,192 +28,46 @@ block_size = 30  # Size of each game block in pixels
 top_left_x = (s_width - play_width) // 2    # X position of the top-left corner of the play area
 top_left_y = s_height - play_height         # Y position of the top-left corner of the play area
 
-# Shape formats
-S = [['.....',
-      '.....',
-      '..00.',
-      '.00..',
-      '.....'],
-     ['.....',
-      '..0..',
-      '..00.',
-      '...0.',
-      '.....']]
-
-Z = [['.....',
-      '.....',
-      '.00..',
-      '..00.',
-      '.....'],
-     ['.....',
-      '..0..',
-      '.00..',
-      '.0...',
-      '.....']]
-
-I = [['.....',
-      '..0..',
-      '..0..',
-      '..0..',
-      '..0..'],
-     ['.....',
-      '0000.',
-      '.....',
-      '.....',
-      '.....']]
-
-O = [['.....',
-      '.....',
-      '.00..',
-      '.00..',
-      '.....']]
-
-J = [['.....',
-      '.0...',
-      '.000.',
-      '.....',
-      '.....'],
-     ['.....',
-      '..00.',
-      '..0..',
-      '..0..',
-      '.....'],
-     ['.....',
-      '.....',
-      '.000.',
-      '...0.',
-      '.....'],
-     ['.....',
-      '..0..',
-      '..0..',
-      '.00..',
-      '.....']]
-
-L = [['.....',
-      '...0.',
-      '.000.',
-      '.....',
-      '.....'],
-     ['.....',
-      '..0..',
-      '..0..',
-      '..00.',
-      '.....'],
-     ['.....',
-      '.....',
-      '.000.',
-      '.0...',
-      '.....'],
-     ['.....',
-      '.00..',
-      '..0..',
-      '..0..',
-      '.....']]
-
-T = [['.....',
-      '..0..',
-      '.000.',
-      '.....',
-      '.....'],
-     ['.....',
-      '..0..',
-      '..00.',
-      '..0..',
-      '.....'],
-     ['.....',
-      '.....',
-      '.000.',
-      '..0..',
-      '.....'],
-     ['.....',
-      '..0..',
-      '.00..',
-      '..0..',
-      '.....']]
-
-shapes = [S, Z, I, O, J, L, T]  # List of shapes for the pieces
-shape_colors = [(0, 255, 0), (255, 0, 0), (0, 255, 255), (255, 255, 0), (255, 165, 0), (0, 0, 255), (128, 0, 128)]  # Corresponding colors for each shape
-
-
-class Piece(object):
-    rows = 20       # Number of rows in the game grid (y-axis)
-    columns = 10    # Number of columns in the game grid (x-axis)
-
-    def __init__(self, column, row, shape):
-        self.x = column                                     # X position of the piece
-        self.y = row                                        # Y position of the piece
-        self.shape = shape                                  # Shape of the piece (e.g., S, Z, I, O, J, L, T)
-        self.color = shape_colors[shapes.index(shape)]      # Color of the piece based on its shape
-        self.rotation = 0                                   # Initial rotation state of the piece
-
-
-
-def create_grid(locked_positions={}):
-    # Creates a grid filled with black color (0,0,0)
-    grid = [[(0, 0, 0) for _ in range(10)] for _ in range(20)]
-
-    # Updates the grid with locked positions
-    for i in range(len(grid)):
-        for j in range(len(grid[i])):
-            if (j, i) in locked_positions:      # Check if the current position is locked
-                c = locked_positions[(j, i)]    # Get the color of the locked position
-                grid[i][j] = c                  # Update the grid position with the locked color
-    return grid
-
-
-def convert_shape_format(shape):
-    positions = []
-    format = shape.shape[shape.rotation % len(shape.shape)]  # Get the current rotation of the shape
-
-    # Convert the shape format to positions
-    for i, line in enumerate(format):
-        row = list(line)
-        for j, column in enumerate(row):
-            if column == '0':
-                positions.append((shape.x + j, shape.y + i))  # Calculate the position of the shape block
-
-    # Adjust positions based on the shape's offset
-    for i, pos in enumerate(positions):
-        positions[i] = (pos[0] - 2, pos[1] - 4)  # Offset adjustment for the shape's position
-
-    # Return the list of positions representing the current shape
-    return positions  
+# Maps the keys handled by the game to engine actions
+key_actions = {
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+    pygame.K_DOWN: DOWN,
+    pygame.K_UP: ROTATE,
+}
 
 
+# Fonts already created, keyed by size
+fonts = {}
 
-def valid_space(shape, grid):
-    # Generates a list of all positions that are currently accepted (black squares) in the grid
-    accepted_positions = [[(j, i) for j in range(10) if grid[i][j] == (0, 0, 0)] for i in range(20)]
-    accepted_positions = [j for sub in accepted_positions for j in sub]  # Flattens the list
+# Game window, opened by get_window() the first time something is drawn
+win = None
 
-    formatted = convert_shape_format(shape)  # Converts the shape format to positions
 
-    # Checks if each position of the current shape is valid (falls within accepted positions)
-    for pos in formatted:
-        if pos not in accepted_positions:   # If the position is not in accepted positions
-            if pos[1] > -1:                 # Checks if the position is above the top boundary of the grid
-                return False                # Returns False indicating invalid space
-    return True                             # Returns True indicating valid space
+def get_font(size):
+    # Returns the default font at the given size, creating it only the first time it is asked for
+    font = fonts.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = fonts[size] = pygame.font.Font(pygame.font.get_default_font(), size)
+    return font
 
 
-def check_lost(positions):
-    # Checks if any of the given positions indicate that the game is lost (piece above the top boundary)
-    for pos in positions:
-        x, y = pos
-        if y < 1:           # If the y-coordinate of the position is less than 1 (above the top boundary)
-            return True     # Returns True indicating the game is lost
-    return False            # Returns False indicating the game is not lost
-
-
-
-def get_shape():
-    # Returns a new Piece object with a random shape at the top center of the grid
-    return Piece(5, 0, random.choice(shapes))
+def get_window():
+    # Returns the game window, initializing Pygame and opening it on the first call
+    global win
+    if win is None or not pygame.display.get_init() or pygame.display.get_surface() is None:
+        pygame.init()
+        fonts.clear()  # Fonts created before a pygame.quit() are no longer valid
+        win = pygame.display.set_mode((s_width, s_height))
+        pygame.display.set_caption('Tetris')
+    return win
 
 
 def draw_text_middle(text, size, color, surface):
     # Draws text in the middle of a given surface
-    font = pygame.font.Font(pygame.font.get_default_font(), size)
+    font = get_font(size)
     label = font.render(text, 1, color)
 
     # Calculates the center position for the text
@@ -221,79 +83,46 @@ def draw_grid(surface, grid):
     # Draws horizontal lines
     for i in range(len(grid)):
         pygame.draw.line(surface, (128, 128, 128), (sx, sy + i * block_size), (sx + play_width, sy + i * block_size))
-        
-        # Draws vertical lines
-        for j in range(len(grid[i])):
-            pygame.draw.line(surface, (128, 128, 128), (sx + j * block_size, sy), (sx + j * block_size, sy + play_height))
-
-
-def clear_rows(grid, locked):
-    # Variable to count the number of rows cleared
-    increment = 0
-    
-    # Iterate through the grid from bottom to top
-    for i in range(len(grid) - 1, -1, -1):
-        row = grid[i]
-        # Check if there are no empty spaces (black squares) in the row
-        if (0, 0, 0) not in row:
-            increment += 1  # Increment the row clear count
-            ind = i  # Store the index of the cleared row
-            # Remove the locked positions from the dictionary
-            for j in range(len(row)):
-                try:
-                    del locked[(j, i)]
-                except:
-                    continue
-
-    # If rows were cleared, update the positions in the locked dictionary
-    if increment > 0:
-        for key in sorted(list(locked), key=lambda x: x[1])[::-1]:
-            x, y = key
-            if y < ind:
-                newKey = (x, y + increment)
-                locked[newKey] = locked.pop(key)
-
-    return increment  # Return the number of rows cleared
+
+    # Draws vertical lines
+    for j in range(len(grid[0])):
+        pygame.draw.line(surface, (128, 128, 128), (sx + j * block_size, sy), (sx + j * block_size, sy + play_height))
 
 
 def draw_next_shape(shape, surface):
     # Font and label for the "Next Shape" text
-    font = pygame.font.Font(pygame.font.get_default_font(), 30)
+    font = get_font(30)
     label = font.render('Next Shape', 1, (255, 255, 255))
 
     # Coordinates for drawing the next shape preview
     sx = top_left_x + play_width + 50
     sy = top_left_y + (play_height / 2 - 100)
 
-    # Get the current rotation format of the shape
-    format = shape.shape[shape.rotation % len(shape.shape)]
+    # Get the current rotation of the shape
+    cells = shape_cells[shape.index]
 
-    # Draw the next shape preview on the surface
-    for i, line in enumerate(format):
-        row = list(line)
-        for j, column in enumerate(row):
-            if column == '0':
-                pygame.draw.rect(surface, shape.color,
-                                 (sx + j * block_size, sy + i * block_size, block_size, block_size), 0)
+    # Draw the next shape preview on the surface (offsets are relative to the template's (2, 4) cell)
+    for dx, dy in cells[shape.rotation % len(cells)]:
+        pygame.draw.rect(surface, shape.color,
+                         (sx + (dx + 2) * block_size, sy + (dy + 4) * block_size, block_size, block_size), 0)
 
     # Draw the "Next Shape" label on the surface
     surface.blit(label, (sx + 10, sy - 30))
 
 
-def draw_window(surface, grid, score=0, level=0):
+def draw_window(surface, grid, score=0, level=0, piece_positions=(), piece_color=None):
     # Fill the surface with black
     surface.fill((0, 0, 0))
 
-    # Initialize and render the "Tetris" title
-    pygame.font.init()
-    font = pygame.font.Font(pygame.font.get_default_font(), 60)
+    # Render the "Tetris" title
+    font = get_font(60)
     label = font.render('Tetris', 1, (255, 255, 255))
 
     # Draw the "Tetris" title in the middle of the play area
     surface.blit(label, (top_left_x + play_width / 2 - (label.get_width() / 2), 30))
 
     # Render and draw the score and level information
-    font = pygame.font.Font(pygame.font.get_default_font(), 30)
+    font = get_font(30)
     label = font.render('Score: ' + str(score), 1, (255, 255, 255))
     sx = top_left_x + play_width + 50
     sy = top_left_y + (play_height / 2 - 100)
@@ -308,6 +137,12 @@ def draw_window(surface, grid, score=0, level=0):
             pygame.draw.rect(surface, grid[i][j],
                              (top_left_x + j * block_size, top_left_y + i * block_size, block_size, block_size), 0)
 
+    # Draw the falling piece on top of the locked cells
+    for x, y in piece_positions:
+        if y > -1:
+            pygame.draw.rect(surface, piece_color,
+                             (top_left_x + x * block_size, top_left_y + y * block_size, block_size, block_size), 0)
+
     # Draw the grid lines
     draw_grid(surface, grid)
 
@@ -315,102 +150,244 @@ def draw_window(surface, grid, score=0, level=0):
     pygame.draw.rect(surface, (255, 0, 0), (top_left_x, top_left_y, play_width, play_height), 5)
 
 
-def main():
-    # Initialize variables for the game
-    locked_positions = {}
-    grid = create_grid(locked_positions)
-    change_piece = False
+class TetrisRenderer(object):
+    """
+    Incremental renderer for the game window.
+
+    The background, title, "Next Shape" label, grid lines and play area border
+    are rendered once into cached surfaces. Each frame only the cells whose
+    color changed, the next shape preview (when the piece changes) and the
+    score and level labels (when their values change) are redrawn, and draw()
+    returns the rectangles to pass to ``pygame.display.update``.
+
+    Parameters:
+        surface (pygame.Surface): Window surface to draw on.
+    """
+
+    line_key = (255, 0, 255)  # Transparent color of the grid lines layer
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.preview_pos = (top_left_x + play_width + 50, top_left_y + (play_height / 2 - 100))
+
+        # Static background: black screen, title and the "Next Shape" label
+        self.background = pygame.Surface(surface.get_size())
+        self.background.fill((0, 0, 0))
+        title = get_font(60).render('Tetris', 1, (255, 255, 255))
+        self.background.blit(title, (top_left_x + play_width / 2 - (title.get_width() / 2), 30))
+        sx, sy = self.preview_pos
+        self.background.blit(get_font(30).render('Next Shape', 1, (255, 255, 255)), (sx + 10, sy - 30))
+
+        # Grid lines and border on a transparent layer, composited over every redrawn cell
+        self.lines = pygame.Surface(surface.get_size())
+        self.lines.fill(self.line_key)
+        self.lines.set_colorkey(self.line_key)
+        draw_grid(self.lines, [[None] * Piece.columns for _ in range(Piece.rows)])
+        pygame.draw.rect(self.lines, (255, 0, 0), (top_left_x, top_left_y, play_width, play_height), 5)
+
+        self.labels = {}        # Rendered label surface and rect, keyed by the label position
+        self.shown = None       # Cell colors currently on screen, None until the first full draw
+        self.preview = None     # (shape index, rotation) of the preview currently on screen
+
+    def draw_cell(self, x, y, color):
+        # Paints one cell and restores the grid lines and border on top of it
+        rect = pygame.Rect(top_left_x + x * block_size, top_left_y + y * block_size, block_size, block_size)
+        self.surface.fill(color, rect)
+        self.surface.blit(self.lines, rect, rect)
+        return rect
+
+    def draw_label(self, text, pos):
+        # Redraws a label only when its text changed, returning the dirty rect or None
+        label = self.labels.get(pos)
+        if label is not None and label[0] == text:
+            return None
+        dirty = None
+        if label is not None:
+            dirty = label[2]
+            self.surface.blit(self.background, dirty, dirty)
+        rendered = get_font(30).render(text, 1, (255, 255, 255))
+        rect = self.surface.blit(rendered, pos)
+        self.labels[pos] = (text, rendered, rect)
+        return rect.union(dirty) if dirty else rect
+
+    def draw_preview(self, shape):
+        # Redraws the next shape preview only when the piece or its rotation changed
+        key = (shape.index, shape.rotation % len(shape_cells[shape.index]))
+        if key == self.preview:
+            return None
+        self.preview = key
+        sx, sy = self.preview_pos
+        rect = pygame.Rect(sx, sy, 5 * block_size, 5 * block_size)
+        self.surface.blit(self.background, rect, rect)
+        for dx, dy in shape_cells[shape.index][key[1]]:
+            self.surface.fill(shape.color, (sx + (dx + 2) * block_size, sy + (dy + 4) * block_size, block_size, block_size))
+        return rect
+
+    def draw(self, engine):
+        """
+        Bring the window up to date with the engine state.
+
+        Returns:
+            list: Rectangles of the window that changed since the previous call.
+        """
+        dirty = []
+        grid = engine.board.grid
+        piece = engine.current_piece
+
+        # First frame: paint the static layers and every cell
+        if self.shown is None:
+            self.surface.blit(self.background, (0, 0))
+            self.surface.blit(self.lines, (0, 0))
+            self.shown = [[None] * len(row) for row in grid]
+            self.labels = {}
+            self.preview = None
+            dirty.append(self.surface.get_rect())
+
+        # Overlay the falling piece on the locked cells, row by row
+        overlay = {}
+        for x, y in convert_shape_format(piece):
+            if y > -1:
+                overlay.setdefault(y, []).append(x)
+
+        for y, row in enumerate(grid):
+            if y in overlay:
+                row = list(row)
+                for x in overlay[y]:
+                    row[x] = piece.color
+            shown = self.shown[y]
+            if row != shown:
+                for x, color in enumerate(row):
+                    if color != shown[x]:
+                        dirty.append(self.draw_cell(x, y, color))
+                self.shown[y] = list(row)
+
+        sx, sy = self.preview_pos
+        for rect in (self.draw_preview(engine.next_piece),
+                     self.draw_label('Score: ' + str(engine.score), (sx + 20, sy + 160)),
+                     self.draw_label('Level: ' + str(engine.level), (sx + 20, sy + 200))):
+            if rect is not None:
+                dirty.append(rect)
+        return dirty
+
+
+def main(fps=60, bot=None, seed=None, record=None, profiler=None, profile=None, das_ms=170, arr_ms=50):
+    # Plays one game, returning True when it was lost and False when the window was closed
+    # Initialize the game engine (seeded, so the game can be replayed) and the fixed-timestep scheduler driving it
+    if seed is None:
+        seed = random.randrange(1 << 32)
+    engine = TetrisEngine(seed=seed)
+    recorder = ReplayRecorder(seed)
+    loop = FixedTimestep(step_ms=TICK_MS, fps=fps)
+    win = get_window()
+    renderer = TetrisRenderer(win)
+    inputs = AutoRepeat(das_ms, arr_ms)  # Held keys repeat after das_ms, every arr_ms
+    if profiler is None:
+        profiler = FrameProfiler(enabled=False)
     run = True
-    current_piece = get_shape()
-    next_piece = get_shape()
-    clock = pygame.time.Clock()
-    fall_time = 0
-    level_time = 0
-    score = 0
-    level = 0
-    fall_speed = 0.27
+    polled = inputs.clock()  # Time of the last event poll: keys read by the next one were pressed after it
 
     while run:
-        # Refresh the game grid and update time variables
-        grid = create_grid(locked_positions)
-        fall_time += clock.get_rawtime()
-        level_time += clock.get_rawtime()
-        clock.tick()
-
-        # Increase difficulty level over time
-        if level_time / 1000 > 5:
-            level_time = 0
-            if fall_speed > 0.12:
-                fall_speed -= 0.005
-                level += 1
-
-        # Move the current piece down automatically based on fall speed
-        if fall_time / 1000 >= fall_speed:
-            fall_time = 0
-            current_piece.y += 1
-            # If the piece cannot move down further, lock it in place
-            if not (valid_space(current_piece, grid)) and current_piece.y > 0:
-                current_piece.y -= 1
-                change_piece = True
+        # Wait for the next frame (idle time is not part of any phase)
+        steps = loop.frame()
 
-        # Handle user input events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-                pygame.display.quit()
-                quit()
+        # Advance gravity and level progression by whole simulation steps
+        with profiler.phase('simulate'):
+            for _ in range(steps):
+                engine.tick(loop.step_ms)
 
-            if event.type == pygame.KEYDOWN:
-                # Move the current piece left, right, down, or rotate based on key press
-                if event.key == pygame.K_LEFT:
-                    current_piece.x -= 1
-                    if not valid_space(current_piece, grid):
-                        current_piece.x += 1
-                if event.key == pygame.K_RIGHT:
-                    current_piece.x += 1
-                    if not valid_space(current_piece, grid):
-                        current_piece.x -= 1
-                if event.key == pygame.K_DOWN:
-                    current_piece.y += 1
-                    if not valid_space(current_piece, grid):
-                        current_piece.y -= 1
-                if event.key == pygame.K_UP:
-                    current_piece.rotation = current_piece.rotation + 1 % len(current_piece.shape)
-                    if not valid_space(current_piece, grid):
-                        current_piece.rotation = current_piece.rotation - 1 % len(current_piece.shape)
-
-        # Convert the current piece shape to grid positions and update the grid
-        shape_pos = convert_shape_format(current_piece)
-        for i in range(len(shape_pos)):
-            x, y = shape_pos[i]
-            if y > -1:
-                grid[y][x] = current_piece.color
-
-        # Check if the piece has landed and lock it in place
-        if change_piece:
-            for pos in shape_pos:
-                p = (pos[0], pos[1])
-                locked_positions[p] = current_piece.color
-            current_piece = next_piece
-            next_piece = get_shape()
-            change_piece = False
-            score += clear_rows(grid, locked_positions) * 10  # Increase score based on cleared rows
-
-        # Draw the game window with updated grid, score, and level
-        draw_window(win, grid, score, level)
-        draw_next_shape(next_piece, win)
-        pygame.display.update()
+        # Handle user input events
+        with profiler.phase('input'):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    run = False
+                    save_replay(recorder, engine, record)
+                    profiler.dump(profile)
+                    report_latency(profiler, inputs)
+                    return False
+
+                if event.type == pygame.KEYDOWN and bot is None:
+                    # Queue the move of the key; left, right and down repeat while the key is held
+                    if event.key in key_actions:
+                        inputs.press(event.key, key_actions[event.key], repeat=key_actions[event.key] != ROTATE,
+                                     timestamp=polled)
+
+                if event.type == pygame.KEYUP:
+                    inputs.release(event.key)
+            polled = inputs.clock()
+
+            # Move the current piece left, right, down, or rotate, in the order the keys were pressed
+            for action in inputs.actions():
+                engine.step(action)
+                recorder.record(engine.ticks, action)
+
+        # Let the auto-player move the piece instead of the keyboard
+        if bot is not None:
+            with profiler.phase('bot'):
+                action = bot.act(engine)
+                if action is not None:
+                    recorder.record(engine.ticks, action)
+
+        # Redraw only the parts of the window that changed
+        with profiler.phase('draw'):
+            rects = renderer.draw(engine)
+            overlay = profiler.draw_overlay(win, get_font(14))
+            if overlay is not None:
+                rects.append(overlay)
+
+        # Push just the changed rects to the screen
+        with profiler.phase('display'):
+            pygame.display.update(rects)
+        inputs.shown()  # The moves of this frame are on screen now
+        profiler.end_frame()
 
         # Check if the game is lost and display "YOU LOST" message
-        if check_lost(locked_positions):
+        if engine.game_over:
             run = False
+            save_replay(recorder, engine, record)
+            profiler.dump(profile)
+            report_latency(profiler, inputs)
             draw_text_middle("YOU LOST", 80, (255, 255, 255), win)
             pygame.display.update()
             pygame.time.delay(1500)
-            pygame.quit()
+    return True
+
+
+def report_latency(profiler, inputs):
+    # Prints the input-to-effect latency when profiling
+    if profiler.enabled and inputs.latency() is not None:
+        print('Input latency p50/p95/p99 (ms): ' + ' / '.join(f'{ms:.1f}' for ms in inputs.latency()))
+
+
+def save_replay(recorder, engine, path):
+    # Writes the replay of the game to the given path, if one was asked for
+    if path:
+        with open(path, 'wb') as f:
+            f.write(recorder.finish(engine))
+
+
+def watch_replay(path, speed=1.0, fps=60):
+    # Renders a recorded game, running the simulation ``speed`` times faster than real time
+    with open(path, 'rb') as f:
+        playback = Replay(f.read()).playback()
+    loop = FixedTimestep(step_ms=TICK_MS / speed, fps=fps, max_steps=max(25, int(25 * speed)))
+    win = get_window()
+    renderer = TetrisRenderer(win)
+
+    while not playback.done:
+        playback.advance(loop.frame())
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return
+        pygame.display.update(renderer.draw(playback.engine))
+
+    engine = playback.engine
+    draw_text_middle('Score: ' + str(engine.score), 60, (255, 255, 255), win)
+    pygame.display.update()
+    pygame.time.delay(1500)
 
 
-def main_menu():
+def main_menu(bot=None, seed=None, record=None, profiler=None, profile=None, das_ms=170, arr_ms=50):
+    win = get_window()
     run = True
     while run:
         win.fill((0, 0, 0))
@@ -420,11 +397,32 @@ def main_menu():
             if event.type == pygame.QUIT:
                 run = False
             if event.type == pygame.KEYDOWN:
-                main()
+                # Back to the menu after a lost game, out of it when the window was closed
+                if not main(bot=bot, seed=seed, record=record, profiler=profiler, profile=profile, das_ms=das_ms, arr_ms=arr_ms):
+                    run = False
+                    break
     pygame.quit()
 
 
-# Initialize the Pygame window and start the main menu loop
-win = pygame.display.set_mode((s_width, s_height))
-pygame.display.set_caption('Tetris')
-main_menu()
+if __name__ == "__main__":
+    # Parse the command line options
+    parser = argparse.ArgumentParser(description='Play Tetris.')
+    parser.add_argument('--bot', action='store_true', help='let the auto-player move the pieces')
+    parser.add_argument('--seed', type=int, help='seed of the piece sequence')
+    parser.add_argument('--record', metavar='FILE', help='save a replay of the game to FILE')
+    parser.add_argument('--replay', metavar='FILE', help='watch a recorded game instead of playing')
+    parser.add_argument('--speed', type=float, default=1.0, help='speed multiplier of the replay')
+    parser.add_argument('--profile', metavar='FILE', help='time every frame phase and write the trace to FILE (.json or .csv)')
+    parser.add_argument('--overlay', action='store_true', help='show the frame phase timings on screen')
+    parser.add_argument('--das', type=float, default=170, help='delay before a held key starts repeating, in milliseconds')
+    parser.add_argument('--arr', type=float, default=50, help='interval between the repeats of a held key, in milliseconds')
+    args = parser.parse_args()
+
+    # Start the main menu loop (or the replay); the window opens on the first frame
+    if args.replay:
+        watch_replay(args.replay, args.speed)
+        pygame.quit()
+    else:
+        profiler = FrameProfiler(enabled=bool(args.profile or args.overlay), show_overlay=args.overlay)
+        main_menu(bot=TetrisBot() if args.bot else None, seed=args.seed, record=args.record,
+                  profiler=profiler, profile=args.profile, das_ms=args.das, arr_ms=args.arr)
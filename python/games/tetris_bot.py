@@ -0,0 +1,293 @@
+# Imports necessary libraries for the auto-player
+import argparse  # Library for parsing the benchmark options
+import time  # Library for measuring the benchmark throughput
+from collections import deque  # Double-ended queue used by the breadth-first search
+
+from tetris_engine import LEFT, RIGHT, DOWN, ROTATE, TetrisEngine, shape_bounds, shape_cells
+
+# Heuristic weights: aggregate height, lines cleared, holes and bumpiness
+weights = (-0.510066, 0.760666, -0.35663, -0.184483)
+
+
+def compile_profiles():
+    # Lowest block of every column of every (shape, rotation), as (dx, dy) pairs
+    profiles = []
+    for rotations in shape_cells:
+        shape_profiles = []
+        for cells in rotations:
+            bottom = {}
+            for dx, dy in cells:
+                bottom[dx] = max(dy, bottom.get(dx, dy))
+            shape_profiles.append(tuple(sorted(bottom.items())))
+        profiles.append(tuple(shape_profiles))
+    return tuple(profiles)
+
+
+# Bottom profiles used to compute straight drop heights from the column tops
+shape_profiles = compile_profiles()
+
+
+def column_tops(row_masks, columns):
+    # Row index of the highest locked cell of every column (the number of rows for empty columns)
+    tops = [len(row_masks)] * columns
+    seen = 0
+    for y, mask in enumerate(row_masks):
+        new = mask & ~seen
+        while new:
+            bit = new & -new
+            tops[bit.bit_length() - 1] = y
+            new ^= bit
+        seen |= mask
+    return tops
+
+
+def place(row_masks, columns, index, rotation, x, y):
+    """
+    Lock a piece into a copy of the row bitmasks and clear the full rows.
+
+    Returns:
+        tuple: ``(row_masks, lines)`` after the placement, or ``(None, 0)`` if
+            part of the piece ends up above the top boundary.
+    """
+    masks = list(row_masks)
+    for dx, dy in shape_cells[index][rotation]:
+        if y + dy < 0:
+            return None, 0
+        masks[y + dy] |= 1 << (x + dx)
+    full = (1 << columns) - 1
+    kept = [mask for mask in masks if mask != full]
+    lines = len(masks) - len(kept)
+    if lines:
+        kept = [0] * lines + kept
+    return kept, lines
+
+
+def evaluate(row_masks, columns, lines):
+    # Scores a board with the holes / aggregate height / bumpiness / lines heuristic
+    rows = len(row_masks)
+    heights = [0] * columns
+    holes = 0
+    seen = 0
+    for y, mask in enumerate(row_masks):
+        holes += bin(seen & ~mask).count('1')   # Empty cells below a locked cell
+        new = mask & ~seen
+        while new:
+            bit = new & -new
+            heights[bit.bit_length() - 1] = rows - y
+            new ^= bit
+        seen |= mask
+    bumpiness = sum(abs(heights[i] - heights[i + 1]) for i in range(columns - 1))
+    return (weights[0] * sum(heights) + weights[1] * lines
+            + weights[2] * holes + weights[3] * bumpiness)
+
+
+class TetrisBot(object):
+    """
+    Auto-player choosing a placement for the current piece with a one-piece lookahead.
+
+    Every reachable final placement of the current piece (all rotations and
+    columns, plus the soft-drop tucks and spins found by a breadth-first
+    search over the moves valid_space() allows) is scored together with the
+    best straight drop of the next piece. Straight drops are found from the
+    column tops and the per-rotation bottom profiles instead of simulating
+    the fall, so evaluating a placement only costs a few bitmask operations.
+
+    The column tops of a board and the drops they give are memoized per
+    board state: every rotation and column of a shape reuses one scan of the
+    rows, and replanning on an unchanged board (after gravity or a blocked
+    move) does not scan it again. The memo is emptied whenever a new piece
+    arrives, since the board it was built for has changed.
+
+    act() feeds one action per call to a TetrisEngine, so the bot can replace
+    the keyboard in tetris.main() or play headless games. Any board with the
+    fits_at() and row_masks interface works, Board or tetris_numpy.ArrayBoard.
+    """
+
+    def __init__(self):
+        self.piece = None           # Piece the current plan was made for
+        self.plan = deque()         # Remaining (state, action) steps of the plan
+        self.target = None          # Final (x, y, rotation) of the plan
+        self.evaluated = 0          # Total number of placements evaluated
+        self.tops_memo = {}         # Board row masks -> column tops
+        self.drops_memo = {}        # (board row masks, shape index) -> straight drops
+
+    def search(self, board, piece):
+        """
+        Breadth-first search of every state reachable by the piece.
+
+        Returns:
+            dict: Final (x, y, rotation) states, where the piece cannot move
+                down any further, mapped to the list of actions reaching them.
+        """
+        index = piece.index
+        count = len(shape_cells[index])
+        bounds = shape_bounds[index]
+        start = (piece.x, piece.y, piece.rotation % count)
+        parents = {start: None}
+        queue = deque([start])
+        finals = []
+        fits_at = board.fits_at
+        while queue:
+            state = queue.popleft()
+            x, y, rotation = state
+            for action, move in ((ROTATE, (x, y, (rotation + 1) % count)), (LEFT, (x - 1, y, rotation)),
+                                 (RIGHT, (x + 1, y, rotation)), (DOWN, (x, y + 1, rotation))):
+                if move in parents:
+                    continue
+                # Cells above the top boundary are not checked against the walls, so keep the
+                # whole piece between them to stop the search from wandering off sideways
+                min_dx, _, max_dx, _ = bounds[move[2]]
+                if move[0] + min_dx < 0 or move[0] + max_dx >= board.columns:
+                    continue
+                if fits_at(index, move[2], move[0], move[1]):
+                    parents[move] = (state, action)
+                    queue.append(move)
+                elif action == DOWN:
+                    finals.append(state)
+
+        paths = {}
+        for state in finals:
+            path = []
+            node = state
+            while parents[node] is not None:
+                node, action = parents[node]
+                path.append((node, action))
+            path.reverse()
+            paths[state] = path
+        return paths
+
+    def tops(self, row_masks, columns):
+        # Column tops of a board, computed once per board state
+        key = tuple(row_masks)
+        tops = self.tops_memo.get(key)
+        if tops is None:
+            tops = self.tops_memo[key] = column_tops(row_masks, columns)
+        return tops
+
+    def drops(self, row_masks, columns, index):
+        # Every straight drop (x, y, rotation) of a shape, memoized per board state and shape
+        key = (tuple(row_masks), index)
+        drops = self.drops_memo.get(key)
+        if drops is None:
+            tops = self.tops(row_masks, columns)
+            drops = []
+            for rotation, profile in enumerate(shape_profiles[index]):
+                xs = [dx for dx, _ in profile]
+                for x in range(-min(xs), columns - max(xs)):
+                    drops.append((x, min(tops[x + dx] - 1 - dy for dx, dy in profile), rotation))
+            self.drops_memo[key] = drops
+        return drops
+
+    def best_next(self, row_masks, columns, index):
+        # Best score of the straight drops of the next piece on a board
+        best = None
+        for x, y, rotation in self.drops(row_masks, columns, index):
+            masks, lines = place(row_masks, columns, index, rotation, x, y)
+            self.evaluated += 1
+            if masks is None:
+                continue
+            score = evaluate(masks, columns, lines)
+            if best is None or score > best:
+                best = score
+        return best
+
+    def choose(self, engine):
+        """
+        Plan the moves of the current piece of an engine.
+
+        Returns:
+            tuple: The chosen final (x, y, rotation) state and the (state, action) path reaching it.
+        """
+        board = engine.board
+        piece = engine.current_piece
+        best, best_state = None, None
+        paths = self.search(board, piece)
+        for state in paths:
+            x, y, rotation = state
+            masks, lines = place(board.row_masks, board.columns, piece.index, rotation, x, y)
+            self.evaluated += 1
+            if masks is None:
+                score = float('-inf')
+            else:
+                lookahead = self.best_next(masks, board.columns, engine.next_piece.index)
+                score = evaluate(masks, board.columns, lines) if lookahead is None else lookahead + weights[1] * lines
+            if best is None or score > best:
+                best, best_state = score, state
+        if best_state is None:
+            return None, []
+        return best_state, paths[best_state]
+
+    def replan(self, engine):
+        # Finds a path to the current target from wherever the piece is now (e.g. after gravity)
+        paths = self.search(engine.board, engine.current_piece)
+        if self.target in paths:
+            self.plan = deque(paths[self.target])
+        else:
+            self.target, path = self.choose(engine)
+            self.plan = deque(path)
+
+    def act(self, engine):
+        """
+        Apply the next planned action to the engine.
+
+        Returns:
+            int: The action applied, or None once the piece is at its target.
+        """
+        piece = engine.current_piece
+        if piece is not self.piece:
+            self.piece = piece
+            self.tops_memo.clear()      # The board changed when the last piece locked
+            self.drops_memo.clear()
+            self.target, path = self.choose(engine)
+            self.plan = deque(path)
+
+        state = (piece.x, piece.y, piece.rotation % len(shape_cells[piece.index]))
+        if self.plan and self.plan[0][0] != state:
+            self.replan(engine)
+        if not self.plan:
+            return None
+
+        _, action = self.plan.popleft()
+        if not engine.step(action):
+            self.replan(engine)
+        return action
+
+
+def play(engine, bot, pieces):
+    # Plays a headless game of up to ``pieces`` pieces, locking each one as soon as it is in place
+    for _ in range(pieces):
+        piece = engine.current_piece
+        while bot.act(engine) is not None and engine.current_piece is piece:
+            pass
+        while engine.current_piece is piece and not engine.game_over:
+            engine.tick(engine.fall_speed * 1000)
+        if engine.game_over:
+            break
+
+
+def benchmark(games=5, pieces=500, seed=0):
+    """
+    Play headless games and measure how fast the bot evaluates placements.
+
+    Returns:
+        tuple: Placements evaluated per second and the average lines cleared per game.
+    """
+    bot = TetrisBot()
+    lines = 0
+    start = time.perf_counter()
+    for game in range(games):
+        engine = TetrisEngine(seed=seed + game)
+        play(engine, bot, pieces)
+        lines += engine.lines
+    return bot.evaluated / (time.perf_counter() - start), lines / games
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the Tetris auto-player.')
+    parser.add_argument('--games', type=int, default=5, help='number of games to play')
+    parser.add_argument('--pieces', type=int, default=500, help='maximum pieces per game')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    args = parser.parse_args()
+
+    rate, lines = benchmark(args.games, args.pieces, args.seed)
+    print(f"{rate:,.0f} placements evaluated per second, {lines:.1f} lines per game")
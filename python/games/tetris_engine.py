@@ -0,0 +1,439 @@
+# Imports necessary libraries for the game rules
+import random  # Library for generating random numbers
+
+# Actions understood by TetrisEngine.step(), matching the keys handled by the pygame front end
+LEFT = 0        # Move the piece one column to the left
+RIGHT = 1       # Move the piece one column to the right
+DOWN = 2        # Move the piece one row down (soft drop)
+ROTATE = 3      # Rotate the piece to its next rotation
+ACTIONS = (LEFT, RIGHT, DOWN, ROTATE)
+
+# Length of one fixed simulation step in milliseconds, see game_loop.FixedTimestep
+TICK_MS = 10
+
+# Shape formats
+S = [['.....',
+      '.....',
+      '..00.',
+      '.00..',
+      '.....'],
+     ['.....',
+      '..0..',
+      '..00.',
+      '...0.',
+      '.....']]
+
+Z = [['.....',
+      '.....',
+      '.00..',
+      '..00.',
+      '.....'],
+     ['.....',
+      '..0..',
+      '.00..',
+      '.0...',
+      '.....']]
+
+I = [['.....',
+      '..0..',
+      '..0..',
+      '..0..',
+      '..0..'],
+     ['.....',
+      '0000.',
+      '.....',
+      '.....',
+      '.....']]
+
+O = [['.....',
+      '.....',
+      '.00..',
+      '.00..',
+      '.....']]
+
+J = [['.....',
+      '.0...',
+      '.000.',
+      '.....',
+      '.....'],
+     ['.....',
+      '..00.',
+      '..0..',
+      '..0..',
+      '.....'],
+     ['.....',
+      '.....',
+      '.000.',
+      '...0.',
+      '.....'],
+     ['.....',
+      '..0..',
+      '..0..',
+      '.00..',
+      '.....']]
+
+L = [['.....',
+      '...0.',
+      '.000.',
+      '.....',
+      '.....'],
+     ['.....',
+      '..0..',
+      '..0..',
+      '..00.',
+      '.....'],
+     ['.....',
+      '.....',
+      '.000.',
+      '.0...',
+      '.....'],
+     ['.....',
+      '.00..',
+      '..0..',
+      '..0..',
+      '.....']]
+
+T = [['.....',
+      '..0..',
+      '.000.',
+      '.....',
+      '.....'],
+     ['.....',
+      '..0..',
+      '..00.',
+      '..0..',
+      '.....'],
+     ['.....',
+      '.....',
+      '.000.',
+      '..0..',
+      '.....'],
+     ['.....',
+      '..0..',
+      '.00..',
+      '..0..',
+      '.....']]
+
+shapes = [S, Z, I, O, J, L, T]  # List of shapes for the pieces
+shape_colors = [(0, 255, 0), (255, 0, 0), (0, 255, 255), (255, 255, 0), (255, 165, 0), (0, 0, 255), (128, 0, 128)]  # Corresponding colors for each shape
+
+
+def compile_shape(shape):
+    """
+    Compile the string templates of a shape into per-rotation lookup tables.
+
+    Returns:
+        tuple: ``(cells, bounds, row_masks)`` with one entry per rotation.
+            ``cells`` are the (dx, dy) offsets of the blocks relative to the
+            piece position, with the (-2, -4) template offset already applied.
+            ``bounds`` are the (min_dx, min_dy, max_dx, max_dy) bounding boxes.
+            ``row_masks`` are (dy, dx, bits, span) tuples, one per occupied row,
+            where bit ``i`` of ``bits`` is set for the block at ``dx + i``.
+    """
+    cells, bounds, row_masks = [], [], []
+    for format in shape:
+        offsets = tuple((j - 2, i - 4) for i, line in enumerate(format) for j, column in enumerate(line) if column == '0')
+        xs = [dx for dx, _ in offsets]
+        ys = [dy for _, dy in offsets]
+        cells.append(offsets)
+        bounds.append((min(xs), min(ys), max(xs), max(ys)))
+
+        rows = []
+        for dy in sorted(set(ys)):
+            row = [dx for dx, y in offsets if y == dy]
+            bits = 0
+            for dx in row:
+                bits |= 1 << (dx - min(row))
+            rows.append((dy, min(row), bits, max(row) - min(row) + 1))
+        row_masks.append(tuple(rows))
+    return tuple(cells), tuple(bounds), tuple(row_masks)
+
+
+# Lookup tables compiled once at import, indexed by [shape index][rotation]
+shape_cells, shape_bounds, shape_row_masks = (tuple(table) for table in zip(*(compile_shape(shape) for shape in shapes)))
+
+
+class Piece(object):
+    rows = 20       # Number of rows in the game grid (y-axis)
+    columns = 10    # Number of columns in the game grid (x-axis)
+
+    def __init__(self, column, row, shape):
+        self.x = column                                     # X position of the piece
+        self.y = row                                        # Y position of the piece
+        self.shape = shape                                  # Shape of the piece (e.g., S, Z, I, O, J, L, T)
+        self.index = shapes.index(shape)                    # Index of the shape in the lookup tables
+        self.color = shape_colors[self.index]               # Color of the piece based on its shape
+        self.rotation = 0                                   # Initial rotation state of the piece
+
+
+class Board(object):
+    """
+    Bitboard representation of the locked cells of the play area.
+
+    Every row is stored as one integer where bit ``x`` is set when column ``x``
+    is occupied, so testing a piece for collision is a handful of AND
+    operations instead of a scan over the whole grid. The color grid is kept
+    alongside as a view that is only read when drawing.
+    """
+
+    def __init__(self, columns=Piece.columns, rows=Piece.rows):
+        self.columns = columns                              # Number of columns in the board
+        self.rows = rows                                    # Number of rows in the board
+        self.full_row = (1 << columns) - 1                  # Bitmask of a row with every column occupied
+        self.row_masks = [0] * rows                         # One occupancy bitmask per row
+        self.grid = [[(0, 0, 0)] * columns for _ in range(rows)]  # Color view of the locked cells
+        self.overflow = False                               # True once a piece locks above the top boundary
+
+    def collides(self, positions):
+        # Checks the given (x, y) cells against the walls, the floor and the locked cells.
+        # Cells above the top boundary are ignored, just like in valid_space().
+        row_masks = self.row_masks
+        for x, y in positions:
+            if y < 0:
+                continue
+            if x < 0 or x >= self.columns or y >= self.rows:
+                return True
+            if row_masks[y] & (1 << x):
+                return True
+        return False
+
+    def fits(self, piece):
+        # Checks a piece against the board using its precompiled row bitmasks
+        return self.fits_at(piece.index, piece.rotation, piece.x, piece.y)
+
+    def fits_at(self, index, rotation, x, y):
+        # Checks the given shape, rotation and position without needing a Piece object
+        row_masks = self.row_masks
+        masks = shape_row_masks[index]
+        for dy, dx, bits, span in masks[rotation % len(masks)]:
+            row = y + dy
+            if row < 0:
+                continue
+            column = x + dx
+            if column < 0 or column + span > self.columns or row >= self.rows:
+                return False
+            if row_masks[row] & (bits << column):
+                return False
+        return True
+
+    def lock(self, positions, color):
+        # Stores the cells of a landed piece in the bitmasks and in the color view
+        for x, y in positions:
+            if y < 0:
+                self.overflow = True
+                continue
+            self.row_masks[y] |= 1 << x
+            self.grid[y][x] = color
+
+    def clear_full_rows(self):
+        # Removes every full row and drops the rows above them, returning the number cleared
+        kept = [i for i, mask in enumerate(self.row_masks) if mask != self.full_row]
+        cleared = self.rows - len(kept)
+        if cleared:
+            self.row_masks = [0] * cleared + [self.row_masks[i] for i in kept]
+            self.grid = [[(0, 0, 0)] * self.columns for _ in range(cleared)] + [self.grid[i] for i in kept]
+        return cleared
+
+    def lost(self):
+        # The game is lost once anything is locked in the top row or above it (see check_lost())
+        return self.overflow or self.row_masks[0] != 0
+
+
+def create_grid(locked_positions={}):
+    # Creates a grid filled with black color (0,0,0)
+    grid = [[(0, 0, 0) for _ in range(10)] for _ in range(20)]
+
+    # Updates the grid with locked positions
+    for i in range(len(grid)):
+        for j in range(len(grid[i])):
+            if (j, i) in locked_positions:      # Check if the current position is locked
+                c = locked_positions[(j, i)]    # Get the color of the locked position
+                grid[i][j] = c                  # Update the grid position with the locked color
+    return grid
+
+
+def convert_shape_format(shape):
+    cells = shape_cells[shape.index]  # Get the precompiled rotations of the shape
+    x, y = shape.x, shape.y
+
+    # Return the list of positions representing the current shape
+    return [(x + dx, y + dy) for dx, dy in cells[shape.rotation % len(cells)]]
+
+
+
+def valid_space(shape, grid):
+    # Boards answer the collision test with their row bitmasks
+    if isinstance(grid, Board):
+        return grid.fits(shape)
+
+    formatted = convert_shape_format(shape)  # Converts the shape format to positions
+
+    # Checks if each position of the current shape is valid (falls on a black square of the grid)
+    for x, y in formatted:
+        if y > -1:                          # Positions above the top boundary of the grid are always accepted
+            if not (0 <= x < len(grid[0]) and y < len(grid)) or grid[y][x] != (0, 0, 0):
+                return False                # Returns False indicating invalid space
+    return True                             # Returns True indicating valid space
+
+
+def check_lost(positions):
+    # Checks if any of the given positions indicate that the game is lost (piece above the top boundary)
+    for pos in positions:
+        x, y = pos
+        if y < 1:           # If the y-coordinate of the position is less than 1 (above the top boundary)
+            return True     # Returns True indicating the game is lost
+    return False            # Returns False indicating the game is not lost
+
+
+
+def get_shape(rng=random):
+    # Returns a new Piece object with a random shape at the top center of the grid
+    return Piece(5, 0, rng.choice(shapes))
+
+def clear_rows(grid, locked):
+    # Indices of the rows cleared
+    cleared = []
+
+    # Iterate through the grid from bottom to top
+    for i in range(len(grid) - 1, -1, -1):
+        row = grid[i]
+        # Check if there are no empty spaces (black squares) in the row
+        if (0, 0, 0) not in row:
+            cleared.append(i)  # Store the index of the cleared row
+            # Remove the locked positions from the dictionary
+            for j in range(len(row)):
+                locked.pop((j, i), None)
+
+    # If rows were cleared, every remaining position drops by the number of cleared rows below it
+    increment = len(cleared)
+    if increment > 0:
+        moved = {}
+        for (x, y), color in locked.items():
+            moved[(x, y + sum(1 for i in cleared if i > y))] = color
+        locked.clear()
+        locked.update(moved)
+
+    return increment  # Return the number of rows cleared
+
+
+
+class TetrisEngine(object):
+    """
+    Headless Tetris simulation with the same rules as the pygame front end.
+
+    The engine never touches pygame: the front end (or a bot, a replay or a
+    benchmark) feeds it actions with step() and elapsed time with tick().
+    Pieces are drawn from an injectable random.Random, so two engines created
+    with the same seed play out identically.
+
+    Parameters:
+        seed (int): Seed for a new random.Random, ignored when ``rng`` is given.
+        rng (random.Random): Random number generator used to pick the pieces.
+        board_factory (callable): Creates the empty board of every new game,
+            e.g. ``lambda: ArrayBoard(20, 40)`` for a larger NumPy-backed board.
+    """
+
+    def __init__(self, seed=None, rng=None, board_factory=Board):
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.board_factory = board_factory
+        self.reset()
+
+    def reset(self):
+        # Starts a new game on an empty board
+        self.board = self.board_factory()
+        self.current_piece = self.new_piece()
+        self.next_piece = self.new_piece()
+        self.fall_time = 0              # Milliseconds since the piece last moved down
+        self.level_time = 0             # Milliseconds since the level last increased
+        self.fall_speed = 0.27          # Seconds between two gravity steps
+        self.score = 0
+        self.level = 0
+        self.lines = 0                  # Total number of rows cleared
+        self.ticks = 0                  # Number of tick() calls since the game started
+        self.game_over = False
+
+    def new_piece(self):
+        # Draws the next piece from the engine's RNG, centered on the board
+        piece = get_shape(self.rng)
+        piece.x = self.board.columns // 2
+        return piece
+
+    def step(self, action):
+        """
+        Apply one player action to the falling piece.
+
+        Parameters:
+            action (int): One of LEFT, RIGHT, DOWN or ROTATE.
+
+        Returns:
+            bool: True if the piece moved, False if the move was blocked.
+        """
+        piece = self.current_piece
+        if action == LEFT:
+            piece.x -= 1
+            if not self.board.fits(piece):
+                piece.x += 1
+                return False
+        elif action == RIGHT:
+            piece.x += 1
+            if not self.board.fits(piece):
+                piece.x -= 1
+                return False
+        elif action == DOWN:
+            piece.y += 1
+            if not self.board.fits(piece):
+                piece.y -= 1
+                return False
+        elif action == ROTATE:
+            piece.rotation += 1
+            if not self.board.fits(piece):
+                piece.rotation -= 1
+                return False
+        else:
+            raise ValueError('Unknown action: %r' % (action,))
+        return True
+
+    def tick(self, dt):
+        """
+        Advance the game clock, applying level progression and gravity.
+
+        Parameters:
+            dt (int): Elapsed time in milliseconds.
+
+        Returns:
+            int: Number of rows cleared by a piece locked during this tick.
+        """
+        self.ticks += 1
+        self.fall_time += dt
+        self.level_time += dt
+
+        # Increase difficulty level over time
+        if self.level_time / 1000 > 5:
+            self.level_time = 0
+            if self.fall_speed > 0.12:
+                self.fall_speed -= 0.005
+                self.level += 1
+
+        # Move the current piece down automatically based on fall speed
+        if self.fall_time / 1000 >= self.fall_speed:
+            self.fall_time = 0
+            piece = self.current_piece
+            piece.y += 1
+            # If the piece cannot move down further, lock it in place
+            if not self.board.fits(piece) and piece.y > 0:
+                piece.y -= 1
+                return self.lock_piece()
+        return 0
+
+    def lock_piece(self):
+        # Locks the current piece, spawns the next one and clears full rows
+        piece = self.current_piece
+        self.board.lock(convert_shape_format(piece), piece.color)
+        self.current_piece = self.next_piece
+        self.next_piece = self.new_piece()
+        cleared = self.board.clear_full_rows()
+        self.lines += cleared
+        self.score += cleared * 10  # Increase score based on cleared rows
+        if self.board.lost():
+            self.game_over = True
+        return cleared
@@ -0,0 +1,401 @@
+# Imports necessary libraries for the NumPy-backed boards
+import time  # Library for measuring the benchmark throughput
+
+import numpy as np  # Library for vectorized array operations
+
+from tetris_engine import ACTIONS, LEFT, RIGHT, DOWN, ROTATE, Board, Piece, convert_shape_format, shape_cells, shape_colors
+
+# Palette of the cell values stored in the board: 0 is empty, shape index + 1 otherwise
+palette = [(0, 0, 0)] + list(shape_colors)
+
+# Palette index of every color of a create_grid() grid
+color_index = {color: i for i, color in enumerate(palette)}
+
+# Palette index of the grid lines drawn by render(), after the board values
+LINE = len(palette)
+
+# RGB lookup table of the rendered palette indices: the board palette, then the gray of the grid lines
+palette_rgb = np.array(palette + [(128, 128, 128)], dtype=np.uint8)
+
+# Size of each game block in pixels, as drawn by tetris.py
+block_size = 30
+
+
+def clear_full_rows(cells):
+    """
+    Remove every full row of a board array and drop the rows above them.
+
+    Full rows are found with a single reduction over the columns and the
+    remaining rows are compacted with one masked copy, so any combination of
+    cleared rows (adjacent or not) is handled and the cost only depends on the
+    board size, never on the number of locked cells.
+
+    Parameters:
+        cells (numpy.ndarray): (rows, columns) uint8 board, 0 for empty cells. Updated in place.
+
+    Returns:
+        int: Number of rows cleared.
+    """
+    full = cells.all(axis=1)            # One reduction finds every full row
+    cleared = int(full.sum())
+    if cleared:
+        cells[cleared:] = cells[~full]  # Masked copy of the kept rows to the bottom
+        cells[:cleared] = 0             # Fresh empty rows at the top
+    return cleared
+
+
+class ArrayBoard(object):
+    """
+    Board stored as a NumPy uint8 array of palette indices.
+
+    Drop-in replacement for tetris_engine.Board (same fits/fits_at/collides/
+    lock/clear_full_rows/lost/grid/row_masks interface) for custom board sizes
+    such as 40x20, e.g. ``TetrisEngine(board_factory=lambda: ArrayBoard(20, 40))``.
+
+    The array is mirrored by one occupancy bitmask per row, kept in step by
+    lock() and clear_full_rows(), so testing a single piece costs the same few
+    AND operations as on Board; a NumPy lookup per piece would spend more
+    time in call overhead than in the four cells it reads.
+
+    Parameters:
+        columns (int): Number of columns in the board.
+        rows (int): Number of rows in the board.
+    """
+
+    def __init__(self, columns=Piece.columns, rows=Piece.rows):
+        self.columns = columns
+        self.rows = rows
+        self.full_row = (1 << columns) - 1                      # Bitmask of a row with every column occupied
+        self.cells = np.zeros((rows, columns), dtype=np.uint8)  # Palette index of every cell
+        self.row_masks = [0] * rows                             # One occupancy bitmask per row
+        self.overflow = False                                   # True once a piece locks above the top boundary
+        self.grid_cache = None                                  # Color view built by the last grid access
+
+    @property
+    def grid(self):
+        # Color view of the locked cells, rebuilt only after the board changed (it is read every frame when drawing)
+        if self.grid_cache is None:
+            self.grid_cache = [[palette[value] for value in row] for row in self.cells.tolist()]
+        return self.grid_cache
+
+    def collides(self, positions):
+        # Checks the given (x, y) cells against the walls, the floor and the locked cells with one array lookup
+        xs, ys = np.asarray(positions, dtype=np.int64).reshape(-1, 2).T
+        visible = ys >= 0   # Cells above the top boundary are ignored, just like in valid_space()
+        if (visible & ((xs < 0) | (xs >= self.columns) | (ys >= self.rows))).any():
+            return True
+        return bool(self.cells[ys[visible], xs[visible]].any())
+
+    # Single pieces are checked against the row bitmasks, exactly as on Board
+    fits = Board.fits
+    fits_at = Board.fits_at
+
+    def lock(self, positions, color):
+        # Stores the cells of a landed piece as palette indices and in the row bitmasks
+        value = palette.index(color)
+        for x, y in positions:
+            if y < 0:
+                self.overflow = True
+                continue
+            self.cells[y, x] = value
+            self.row_masks[y] |= 1 << x
+        self.grid_cache = None
+
+    def clear_full_rows(self):
+        # Removes every full row with the vectorized compaction, returning the number cleared
+        cleared = clear_full_rows(self.cells)
+        if cleared:
+            self.row_masks = [0] * cleared + [mask for mask in self.row_masks if mask != self.full_row]
+            self.grid_cache = None
+        return cleared
+
+    def lost(self):
+        # The game is lost once anything is locked in the top row or above it
+        return self.overflow or self.row_masks[0] != 0
+
+
+def compile_cell_table():
+    # Stacks the cell offsets of every shape into a (shapes, 4 rotations, 4 cells, 2) array.
+    # Shapes with fewer rotations repeat them, so ``rotation % 4`` indexes every shape.
+    return np.array([[cells[r % len(cells)] for r in range(4)] for cells in shape_cells], dtype=np.int32)
+
+
+# Cell offsets of every (shape, rotation), used to place all the pieces of a batch at once
+cell_table = compile_cell_table()
+
+
+def grid_to_cells(grid):
+    # Converts a create_grid() color grid to a (rows, columns) uint8 array of palette indices
+    return np.array([[color_index[color] for color in row] for row in grid], dtype=np.uint8)
+
+
+def add_pieces(cells, shape, rotation, x, y):
+    """
+    Paint falling pieces over a copy of one board or a batch of boards.
+
+    Parameters:
+        cells (numpy.ndarray): (rows, columns) board or (N, rows, columns) batch of palette indices.
+        shape (int or numpy.ndarray): Shape index of the piece of every board.
+        rotation (int or numpy.ndarray): Rotation of every piece.
+        x (int or numpy.ndarray): Column of every piece.
+        y (int or numpy.ndarray): Row of every piece (cells above the top boundary are not drawn).
+
+    Returns:
+        numpy.ndarray: The boards with the pieces drawn as shape index + 1.
+    """
+    single = cells.ndim == 2
+    cells = np.array(cells[None] if single else cells)
+    n = len(cells)
+    shape = np.broadcast_to(shape, n)
+    offsets = cell_table[shape, np.broadcast_to(rotation, n) % 4]
+    xs = np.broadcast_to(x, n)[:, None] + offsets[:, :, 0]
+    ys = np.broadcast_to(y, n)[:, None] + offsets[:, :, 1]
+    boards = np.broadcast_to(np.arange(n)[:, None], xs.shape)
+    visible = ys >= 0
+    cells[boards[visible], ys[visible], xs[visible]] = np.broadcast_to(shape[:, None] + 1, xs.shape)[visible]
+    return cells[0] if single else cells
+
+
+def render(cells, block=block_size, size=None, rgb=True, lines=False):
+    """
+    Render boards to images without pygame.
+
+    Each image row and column picks its board row and column from an index
+    vector, so expanding each cell to a block of pixels and downscaling a
+    board to a small observation are the same two vectorized gathers, for a
+    single board or a whole batch at once. Colors are looked up on the small
+    board before it is expanded.
+
+    Parameters:
+        cells (numpy.ndarray): (rows, columns) board or (N, rows, columns) batch of palette indices.
+        block (int): Size of a cell in pixels, when ``size`` is not given.
+        size (tuple): (height, width) of the images, scaled from the board with nearest-neighbour sampling.
+        rgb (bool): Return RGB pixels instead of palette indices.
+        lines (bool): Draw the gray grid lines of draw_window() along the top and left edge of every cell.
+
+    Returns:
+        numpy.ndarray: (..., height, width, 3) uint8 RGB images, or (..., height, width) palette
+            indices (LINE for the grid lines) when ``rgb`` is False.
+    """
+    cells = np.asarray(cells)
+    rows, columns = cells.shape[-2:]
+    height, width = size if size is not None else (rows * block, columns * block)
+    ys = np.arange(height) * rows // height         # Board row of every image row
+    xs = np.arange(width) * columns // width        # Board column of every image column
+    axis = cells.ndim - 2                           # Row axis, after the batch axes
+
+    image = palette_rgb[cells] if rgb else cells
+    image = np.take(np.take(image, ys, axis=axis), xs, axis=axis + 1)
+    if lines:
+        pixel = () if not rgb else (slice(None),)
+        image[(Ellipsis, np.r_[True, ys[1:] != ys[:-1]], slice(None)) + pixel] = palette_rgb[LINE] if rgb else LINE
+        image[(Ellipsis, np.r_[True, xs[1:] != xs[:-1]]) + pixel] = palette_rgb[LINE] if rgb else LINE
+    return image
+
+
+class VectorTetris(object):
+    """
+    Batch of independent Tetris boards stepped together with vectorized NumPy operations.
+
+    The N boards are stored as one (N, rows, columns) uint8 array and the
+    falling pieces as arrays of shape, rotation and position, so step()
+    applies a whole batch of actions (LEFT, RIGHT, DOWN or ROTATE, as handled
+    in tetris.main(), or -1 for no action) with a few array operations instead
+    of a Python loop per board. Every step is followed by one row of gravity;
+    pieces that cannot fall any further are locked, full rows are cleared and
+    games that meet the check_lost() condition are reset automatically.
+
+    Parameters:
+        n (int): Number of boards.
+        columns (int): Number of columns of every board.
+        rows (int): Number of rows of every board.
+        seed (int): Seed of the generator used to pick the pieces.
+    """
+
+    def __init__(self, n, columns=Piece.columns, rows=Piece.rows, seed=None):
+        self.n = n
+        self.columns = columns
+        self.rows = rows
+        self.rng = np.random.default_rng(seed)
+        self.cells = np.zeros((n, rows, columns), dtype=np.uint8)
+        self.shape = np.zeros(n, dtype=np.int32)
+        self.rotation = np.zeros(n, dtype=np.int32)
+        self.x = np.zeros(n, dtype=np.int32)
+        self.y = np.zeros(n, dtype=np.int32)
+        self.next_shape = np.zeros(n, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lines = np.zeros(n, dtype=np.int64)
+        self.board_steps = 0            # Total number of board-steps simulated
+        self.games = 0                  # Total number of finished games
+        self.reset()
+
+    def reset(self, mask=None):
+        # Starts new games on the selected boards (all of them by default)
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        count = int(mask.sum())
+        self.cells[mask] = 0
+        self.score[mask] = 0
+        self.lines[mask] = 0
+        self.next_shape[mask] = self.rng.integers(0, len(shape_cells), count)
+        self.spawn(mask)
+
+    def spawn(self, mask):
+        # Moves the next piece of the selected boards to the top center and draws a new next piece
+        self.shape[mask] = self.next_shape[mask]
+        self.next_shape[mask] = self.rng.integers(0, len(shape_cells), int(mask.sum()))
+        self.rotation[mask] = 0
+        self.x[mask] = self.columns // 2
+        self.y[mask] = 0
+
+    def positions(self, x, y, rotation):
+        # Returns the (N, 4) columns and rows of the pieces at the given positions
+        offsets = cell_table[self.shape, rotation % 4]
+        return x[:, None] + offsets[:, :, 0], y[:, None] + offsets[:, :, 1]
+
+    def collides(self, x, y, rotation):
+        # Vectorized valid_space(): True for the boards where the pieces hit a wall, the floor or a locked cell
+        xs, ys = self.positions(x, y, rotation)
+        visible = ys >= 0   # Cells above the top boundary are ignored
+        inside = (xs >= 0) & (xs < self.columns) & (ys < self.rows)
+        occupied = self.cells[np.arange(self.n)[:, None],
+                              np.clip(ys, 0, self.rows - 1),
+                              np.clip(xs, 0, self.columns - 1)] != 0
+        return (visible & (~inside | occupied)).any(axis=1)
+
+    def step(self, actions):
+        """
+        Apply one action to every board, followed by one row of gravity.
+
+        Parameters:
+            actions (numpy.ndarray): (N,) array of LEFT, RIGHT, DOWN, ROTATE or -1.
+
+        Returns:
+            tuple: ``(cleared, done)`` arrays with the rows cleared on every board
+                and a mask of the games lost (and reset) during this step.
+        """
+        actions = np.asarray(actions)
+
+        # Player moves, undone on the boards where they collide
+        x = self.x + (actions == RIGHT) - (actions == LEFT)
+        y = self.y + (actions == DOWN)
+        rotation = self.rotation + (actions == ROTATE)
+        blocked = self.collides(x, y, rotation)
+        self.x = np.where(blocked, self.x, x)
+        self.y = np.where(blocked, self.y, y)
+        self.rotation = np.where(blocked, self.rotation, rotation)
+
+        # Gravity, locking the pieces that cannot move down any further
+        landed = self.collides(self.x, self.y + 1, self.rotation)
+        self.y += ~landed
+        cleared = np.zeros(self.n, dtype=np.int64)
+        done = np.zeros(self.n, dtype=bool)
+        if landed.any():
+            cleared, done = self.lock(landed)
+
+        self.board_steps += self.n
+        return cleared, done
+
+    def lock(self, landed):
+        # Locks the landed pieces, clears full rows and resets the lost games
+        xs, ys = self.positions(self.x, self.y, self.rotation)
+        boards = np.broadcast_to(np.arange(self.n)[:, None], xs.shape)
+        visible = landed[:, None] & (ys >= 0)
+        self.cells[boards[visible], ys[visible], xs[visible]] = np.broadcast_to(self.shape[:, None] + 1, xs.shape)[visible]
+        overflow = (landed[:, None] & (ys < 0)).any(axis=1)
+
+        # Batched clear_full_rows(): full rows sort first, kept rows keep their order below them
+        full = self.cells.all(axis=2)
+        cleared = full.sum(axis=1)
+        hit = np.flatnonzero(cleared)
+        if hit.size:
+            order = np.argsort(~full[hit], axis=1, kind='stable')
+            compacted = np.take_along_axis(self.cells[hit], order[:, :, None], axis=1)
+            compacted[np.arange(self.rows)[None, :] < cleared[hit, None]] = 0
+            self.cells[hit] = compacted
+        self.lines += cleared
+        self.score += cleared * 10
+
+        self.spawn(landed)
+
+        # check_lost(): anything locked in the top row or above it ends the game
+        done = overflow | (landed & self.cells[:, 0].any(axis=1))
+        if done.any():
+            self.games += int(done.sum())
+            self.reset(done)
+        return cleared, done
+
+    def render(self, block=1, size=None, rgb=True, lines=False):
+        # Renders every board with its falling piece, as in render(); one pixel per cell by default
+        return render(add_pieces(self.cells, self.shape, self.rotation, self.x, self.y), block, size, rgb, lines)
+
+    def grid(self, i):
+        # Color grid of board ``i`` with its falling piece, in the create_grid() format
+        grid = [[palette[value] for value in row] for row in self.cells[i].tolist()]
+        cells = shape_cells[self.shape[i]]
+        for dx, dy in cells[self.rotation[i] % len(cells)]:
+            x, y = self.x[i] + dx, self.y[i] + dy
+            if y > -1:
+                grid[y][x] = shape_colors[self.shape[i]]
+        return grid
+
+
+def benchmark(n=4096, steps=500, seed=0):
+    """
+    Step ``n`` boards with random actions and measure the throughput.
+
+    Returns:
+        float: Board-steps simulated per second.
+    """
+    env = VectorTetris(n, seed=seed)
+    actions = np.random.default_rng(seed).integers(-1, len(ACTIONS), (steps, n))
+    start = time.perf_counter()
+    for i in range(steps):
+        env.step(actions[i])
+    return env.board_steps / (time.perf_counter() - start)
+
+
+def benchmark_render(n=256, frames=20, block=block_size, size=None):
+    """
+    Render ``frames`` batches of ``n`` boards with their pieces and measure the throughput.
+
+    Returns:
+        float: Frames rendered per second.
+    """
+    env = VectorTetris(n, seed=0)
+    actions = np.random.default_rng(0).integers(-1, len(ACTIONS), n)
+    for _ in range(200):
+        env.step(actions)   # Fill the boards a little
+    start = time.perf_counter()
+    for _ in range(frames):
+        env.render(block, size)
+    return n * frames / (time.perf_counter() - start)
+
+
+def benchmark_pygame(frames=100):
+    # Frames per second of draw_window() on an offscreen surface, copied to an array, for comparison
+    import os
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    from tetris import draw_window, s_width, s_height
+    from tetris_engine import TetrisEngine
+
+    pygame.font.init()
+    engine = TetrisEngine(seed=0)
+    surface = pygame.Surface((s_width, s_height))
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw_window(surface, engine.board.grid, engine.score, engine.level,
+                    convert_shape_format(engine.current_piece), engine.current_piece.color)
+        pygame.surfarray.array3d(surface)
+    return frames / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    for n in (1, 64, 1024, 4096, 16384):
+        print(f"{n:>6} boards: {benchmark(n, steps=max(50, 200000 // n)):,.0f} board-steps/s")
+
+    print(f"draw_window + surfarray: {benchmark_pygame():,.0f} frames/s")
+    for n in (1, 256):
+        print(f"{n:>6} boards, 300x600 RGB: {benchmark_render(n, frames=max(5, 2000 // n)):,.0f} frames/s")
+        print(f"{n:>6} boards, 84x84 RGB:   {benchmark_render(n, frames=max(5, 2000 // n), size=(84, 84)):,.0f} frames/s")
@@ -0,0 +1,334 @@
+import argparse  # Imports the 'argparse' library for parsing the command line options.
+import csv  # Imports the 'csv' library for reading the header of CSV files.
+import itertools  # Imports the 'itertools' library for reading CSV files a chunk of lines at a time.
+import os  # Imports the 'os' library for telling CSV and Parquet files apart.
+import time  # Imports the 'time' library for measuring the throughput.
+
+import numpy as np  # Imports the 'numpy' library for converting whole chunks at once.
+
+from currency_converter import rate_cache  # Shared rate cache: one table serves the whole run.
+
+CHUNK_ROWS = 1 << 18        # Rows converted at a time; memory use depends on this, not on the file size.
+LETTERS = 26                # Currency codes are three letters, so there are 26 ** 3 possible codes.
+CSV_FIELDS = np.dtype([("amount", "S32"), ("from", "S8"), ("to", "S8")])  # Widths of the fields read from CSV.
+
+
+class BulkConverter(object):
+    """
+    Converts arrays of amounts between the currencies of one exchange rate table.
+
+    Every currency code is mapped to an integer index into a vector of USD
+    rates, so a chunk of rows is converted with two array lookups and one
+    division, whatever the mix of currency pairs. The three letters of a code
+    are read as a base-26 number, and a lookup table of 26 ** 3 entries gives
+    its index, so encoding a column of codes is itself one array operation.
+    Unknown codes map to a trailing NaN rate and convert to NaN.
+
+    Parameters:
+        rates (dict): Exchange rates of every currency against one base, fetched once from the shared cache if None.
+    """
+
+    def __init__(self, rates=None):
+        rates = rate_cache.table() if rates is None else rates
+        self.codes = sorted(code for code in rates if len(code) == 3 and code.isalpha() and code.isupper())
+        self.unknown = len(self.codes)                                          # Index of the unknown codes.
+        self.rates = np.array([rates[code] for code in self.codes] + [np.nan])  # Rate of every index, NaN last.
+        self.lookup = np.full(LETTERS ** 3, self.unknown, dtype=np.int32)       # Base-26 code -> rate index.
+        self.lookup[self.keys(np.array(self.codes, dtype="S4"))] = np.arange(self.unknown, dtype=np.int32)
+
+    @staticmethod
+    def keys(codes):
+
+        # Base-26 number of every code ('S' array of any width), or -1 for anything that is not three ASCII letters.
+        letters = codes.astype("S4").view(np.uint8).reshape(-1, 4)
+        upper = (letters[:, :3] & 0xDF).astype(np.int32) - ord("A")        # Lower case letters count as upper case.
+        valid = ((upper >= 0) & (upper < LETTERS)).all(axis=1) & (letters[:, 3] == 0)
+        keys = (upper[:, 0] * LETTERS + upper[:, 1]) * LETTERS + upper[:, 2]
+        return np.where(valid, keys, -1)
+
+    def indices(self, codes):
+        """
+        Rate indices of a column of currency codes.
+
+        Parameters:
+            codes (numpy.ndarray): Currency codes as bytes (an 'S' array), or a pyarrow array of strings.
+
+        Returns:
+            numpy.ndarray: Index of every code into the rate vector, the unknown index for invalid codes.
+        """
+        if not isinstance(codes, np.ndarray):
+            # Arrow column: look up each distinct code once, then spread the indices over the rows.
+            encoded = codes.dictionary_encode()
+            distinct = self.indices(np.array(encoded.dictionary.to_pylist(), dtype="S4"))
+            positions = encoded.indices.fill_null(len(distinct)).to_numpy()
+            return np.append(distinct, self.unknown)[positions]
+        keys = self.keys(codes)
+        return np.where(keys >= 0, self.lookup[keys], self.unknown)
+
+    def convert(self, amounts, from_codes, to_codes):
+        """
+        Convert a chunk of amounts, each between its own pair of currencies.
+
+        Returns:
+            numpy.ndarray: Converted amounts (float64), NaN where a currency code is unknown.
+        """
+        rates = self.rates
+        return np.asarray(amounts, dtype=np.float64) * rates[self.indices(to_codes)] / rates[self.indices(from_codes)]
+
+
+def read_csv(path, chunk_rows=CHUNK_ROWS, columns=("amount", "from", "to")):
+
+    # Yields (amounts, from codes, to codes) of up to chunk_rows rows of a CSV file with a header line.
+    # The three columns are the fields as they are in the file ('S' arrays), so the amounts and codes are
+    # written back unchanged; parse_amounts() turns the amounts into numbers.
+    with open(path, newline="") as f:
+        header = next(csv.reader([f.readline()]))
+        missing = [name for name in columns if name not in header]
+        if missing:
+            raise ValueError(f"{path} has no {', '.join(missing)} column")
+        usecols = [header.index(name) for name in columns]
+        while True:
+            lines = list(itertools.islice(f, chunk_rows))
+            if not lines:
+                return
+            rows = np.loadtxt(lines, delimiter=",", quotechar='"', usecols=usecols, dtype=CSV_FIELDS, ndmin=1)
+            fields = tuple(np.ascontiguousarray(rows[name]) for name in CSV_FIELDS.names)
+            if any(field.view(np.uint8)[field.itemsize - 1::field.itemsize].any() for field in fields):
+                # A field fills its whole width and may have been cut: read the chunk again with
+                # fields as wide as the longest one (slower, as it takes an extra pass over the text)
+                rows = np.loadtxt(lines, delimiter=",", quotechar='"', usecols=usecols, dtype="S", ndmin=2)
+                fields = tuple(np.ascontiguousarray(rows[:, i]) for i in range(3))
+            yield fields
+
+
+def parse_amounts(amounts):
+
+    # Amounts as float64 numbers; CSV fields that are not numbers (blank or malformed) become NaN.
+    if not isinstance(amounts, np.ndarray) or amounts.dtype.kind != "S":
+        return np.asarray(amounts, dtype=np.float64)
+    try:
+        return amounts.astype(np.float64)                       # Every field is a number: one array operation.
+    except ValueError:
+        return np.array([to_float(field) for field in amounts.tolist()], dtype=np.float64)
+
+
+def to_float(field):
+
+    # Number of one amount field, NaN if it is not a number.
+    try:
+        return float(field)
+    except ValueError:
+        return np.nan
+
+
+def read_parquet(path, chunk_rows=CHUNK_ROWS, columns=("amount", "from", "to")):
+
+    # Yields (amounts, from codes, to codes) of up to chunk_rows rows of a Parquet file (requires pyarrow).
+    parquet = import_parquet()
+    for batch in parquet.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=list(columns)):
+        amounts, from_codes, to_codes = (batch.column(name) for name in columns)
+        yield amounts.to_numpy(zero_copy_only=False).astype(np.float64), from_codes, to_codes
+
+
+def import_parquet():
+
+    # Imports pyarrow.parquet, which is only needed for Parquet files.
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Reading and writing Parquet files requires pyarrow (pip install pyarrow)") from None
+    return pyarrow.parquet
+
+
+def text_matrix(values, decimals):
+    """
+    Format numbers with a fixed number of decimals as rows of ASCII bytes.
+
+    The digits are cut from the number scaled to an integer, rounded half to
+    even, so a value that sits on a tie in binary may differ from Python's
+    formatting in its last decimal.
+
+    Returns:
+        numpy.ndarray: (N, width) uint8 matrix, each row one number padded with zero bytes, empty for NaN.
+    """
+    finite = np.isfinite(values)
+    magnitude = np.abs(np.where(finite, values, 0)) * 10 ** decimals
+    if magnitude.max(initial=0) >= 1e18:
+        # Too large for 64-bit integers: format this chunk one number at a time
+        text = [f"{value:.{decimals}f}" if ok else "" for value, ok in zip(values.tolist(), finite.tolist())]
+        return np.array(text, dtype="S").view(np.uint8).reshape(len(text), -1)
+    scaled = np.rint(magnitude).astype(np.int64)
+    width = max(len(str(int(scaled.max(initial=0)))), decimals + 1)     # Digits of the longest number
+    whole = width - decimals                                            # Digits before the decimal point
+    chars = np.zeros((len(scaled), width + 2), dtype=np.uint8)          # Sign, integer part, point, decimals
+    rest = scaled if width > 9 else scaled.astype(np.int32)             # 32-bit division is faster when it fits
+    for column in range(width - 1, -1, -1):                             # One vector division per digit
+        quotient = rest // 10
+        chars[:, 1 + column + (column >= whole)] = rest - quotient * 10 + ord("0")
+        rest = quotient
+    if decimals:
+        chars[:, 1 + whole] = ord(".")
+    else:
+        chars = chars[:, :-1]
+    # Leading zeros are dropped, except the one before the decimal point
+    length = np.searchsorted(10 ** np.arange(1, width, dtype=np.int64), scaled, side="right") + 1
+    blank = width - np.maximum(length, decimals + 1)
+    chars[:, 1:1 + whole] *= np.arange(whole) >= blank[:, None]
+    chars[:, 0] = np.where((values < 0) & (scaled != 0), ord("-"), 0)
+    chars *= finite[:, None]
+    return chars
+
+
+def field_matrix(fields):
+
+    # Text fields (an 'S' array or a pyarrow array of strings) as rows of bytes padded with zero bytes,
+    # quoted when they hold a comma or a quote.
+    if not isinstance(fields, np.ndarray):
+        fields = np.array([field.encode() for field in fields.fill_null("").to_pylist()], dtype="S")
+    fields = np.ascontiguousarray(fields)
+    chars = fields.view(np.uint8).reshape(len(fields), fields.dtype.itemsize)
+    chars = chars[:, :np.flatnonzero(chars.any(axis=0)).max(initial=-1) + 1]   # Drops the padding no field uses.
+    if ((chars == ord(",")) | (chars == ord('"'))).any():
+        quoted = [b'"' + field.replace(b'"', b'""') + b'"' if b"," in field or b'"' in field else field
+                  for field in fields.tolist()]
+        fields = np.array(quoted, dtype="S")
+        chars = fields.view(np.uint8).reshape(len(fields), fields.dtype.itemsize)
+    return chars
+
+
+class CsvWriter(object):
+    """
+    Writes converted chunks to a CSV file as they come.
+
+    Every field of a chunk is rendered into a matrix of bytes padded with zero
+    bytes, the matrices are joined with separator columns and the padding is
+    deleted, so a whole chunk becomes text in a few array operations. Amounts
+    read from a CSV file are written as they were; only numbers (from a
+    Parquet file, and the converted amounts) are formatted with ``decimals``.
+
+    Parameters:
+        path (str): File to write.
+        decimals (int): Decimals of the amounts written.
+    """
+
+    def __init__(self, path, decimals=2):
+        self.file = open(path, "wb")
+        self.file.write(b"amount,from,to,converted\n")
+        self.decimals = decimals
+
+    def write(self, amounts, from_codes, to_codes, converted):
+        rows = len(amounts)
+        comma = np.full((rows, 1), ord(","), dtype=np.uint8)
+        newline = np.full((rows, 1), ord("\n"), dtype=np.uint8)
+        if isinstance(amounts, np.ndarray) and amounts.dtype.kind == "S":
+            amounts = field_matrix(amounts)                         # Fields of a CSV file, unchanged.
+        else:
+            amounts = text_matrix(parse_amounts(amounts), self.decimals)
+        text = np.hstack([amounts, comma, field_matrix(from_codes), comma,
+                          field_matrix(to_codes), comma, text_matrix(converted, self.decimals), newline])
+        self.file.write(text.tobytes().translate(None, b"\0"))     # Drops the padding in one pass over the bytes.
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter(object):
+    """
+    Writes converted chunks to a Parquet file as they come, one row group per chunk (requires pyarrow).
+
+    Parameters:
+        path (str): File to write.
+    """
+
+    def __init__(self, path, decimals=None):
+        import_parquet()
+        import pyarrow
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([("amount", pyarrow.float64()), ("from", pyarrow.string()),
+                                      ("to", pyarrow.string()), ("converted", pyarrow.float64())])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write(self, amounts, from_codes, to_codes, converted):
+        pyarrow = self.pyarrow
+        columns = [pyarrow.array(parse_amounts(amounts), from_pandas=True)]   # Malformed amounts are null.
+        for codes in (from_codes, to_codes):
+            if isinstance(codes, np.ndarray):
+                codes = pyarrow.array(codes, pyarrow.binary())      # Bytes from a CSV file: no copy per row.
+            columns.append(codes.cast(pyarrow.string()))
+        columns.append(pyarrow.array(converted, from_pandas=True))  # NaN is written as null.
+        self.writer.write_batch(pyarrow.record_batch(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def is_parquet(path):
+
+    # Whether a path names a Parquet file, by its extension.
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def convert_file(source, destination, rates=None, chunk_rows=CHUNK_ROWS, columns=("amount", "from", "to"),
+                 decimals=2):
+    """
+    Convert every row of a CSV or Parquet file of transactions, streaming it a chunk at a time.
+
+    Only one chunk is in memory at a time, and the rates are fetched once for
+    the whole file. The output holds the amount, from and to columns followed
+    by the converted amount; rows with an unknown currency code or an amount
+    that is not a number are kept, with an empty (CSV) or null (Parquet)
+    converted amount. The output is written to a temporary file that replaces
+    ``destination`` only once the whole source was converted, so a failure
+    never leaves half a file behind.
+
+    Parameters:
+        source (str): CSV or Parquet file to read, by extension (.csv, .parquet).
+        destination (str): CSV or Parquet file to write, by extension.
+        rates (dict): Exchange rates against one base, fetched from the shared cache if None.
+        chunk_rows (int): Rows converted at a time.
+        columns (tuple): Names of the amount, from currency and to currency columns of the source.
+        decimals (int): Decimals of the amounts written to a CSV file.
+
+    Returns:
+        dict: Number of 'rows', rows with an 'unknown' currency code, rows with an 'invalid' (missing or
+        malformed) amount, and 'seconds' taken.
+    """
+    start = time.perf_counter()
+    converter = BulkConverter(rates)
+    reader = read_parquet if is_parquet(source) else read_csv
+    temporary = f"{destination}.{os.getpid()}.tmp"
+    writer = (ParquetWriter if is_parquet(destination) else CsvWriter)(temporary, decimals)
+    rows = unknown = invalid = 0
+    try:
+        for amounts, from_codes, to_codes in reader(source, chunk_rows, columns):
+            values = parse_amounts(amounts)
+            converted = converter.convert(values, from_codes, to_codes)
+            writer.write(amounts, from_codes, to_codes, converted)
+            rows += len(converted)
+            missing = int(np.isnan(values).sum())
+            invalid += missing
+            unknown += int(np.isnan(converted).sum()) - missing
+    except BaseException:
+        writer.close()
+        os.remove(temporary)
+        raise
+    writer.close()
+    os.replace(temporary, destination)
+    return {"rows": rows, "unknown": unknown, "invalid": invalid, "seconds": time.perf_counter() - start}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert every transaction of a CSV or Parquet file.")
+    parser.add_argument("source", help="CSV or Parquet file with amount, from and to columns")
+    parser.add_argument("destination", help="CSV or Parquet file to write, with a converted column added")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows converted at a time")
+    parser.add_argument("--columns", nargs=3, default=("amount", "from", "to"), metavar=("AMOUNT", "FROM", "TO"),
+                        help="names of the amount, from currency and to currency columns")
+    parser.add_argument("--decimals", type=int, default=2, help="decimals of the amounts written to CSV")
+    args = parser.parse_args()
+
+    stats = convert_file(args.source, args.destination, chunk_rows=args.chunk_rows, columns=tuple(args.columns),
+                         decimals=args.decimals)
+    print(f"{stats['rows']:,} rows converted in {stats['seconds']:.2f} s "
+          f"({stats['rows'] / max(stats['seconds'], 1e-9):,.0f} rows per second), "
+          f"{stats['unknown']:,} with an unknown currency code, {stats['invalid']:,} with an invalid amount")
@@ -1,22 +1,240 @@
+import json  # Imports the 'json' library for reading and writing the on-disk rate cache.
+import os  # Imports the 'os' library for locating and atomically replacing the cache file.
+import random  # Imports the 'random' library for jittering the delay between retries.
+import threading  # Imports the 'threading' library for refreshing stale rates in the background.
+import time  # Imports the 'time' library for checking the age of the cached rates.
+
 import requests  # Imports the 'requests' library for making HTTP requests to the API.
 
+BASE_URL = "https://api.exchangerate-api.com/v4/latest/"                     # API endpoint, followed by the base currency.
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "currency_rates.json")  # Default on-disk cache file.
+RETRY_STATUS = (429, 500, 502, 503, 504)                                    # HTTP errors worth another try.
+
+
+def request_rates(session, url, timeout):
+
+    # Sends one request for a rate table and returns its rates.
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.json()["rates"]
+
+
+def retryable(error):
+
+    # Whether a failed request may succeed if sent again: network errors, timeouts and overloaded servers.
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRY_STATUS
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def retry_delay(attempt, backoff):
+
+    # Seconds to wait before the next try: exponential backoff with full jitter, so clients do not retry in step.
+    return random.uniform(0, backoff * 2 ** attempt)
+
+
+def fetch_rates(session, url, timeout=10, retries=3, backoff=0.25):
+    """
+    Fetch a rate table, retrying network errors, timeouts and overloaded servers.
+
+    Parameters:
+        session (requests.Session): Session whose pooled connections are reused.
+        url (str): Endpoint of the table.
+        timeout (float): Seconds to wait for the server on each try.
+        retries (int): Tries after the first one.
+        backoff (float): Upper bound of the first delay between tries, doubled after every try.
+
+    Returns:
+        dict: Exchange rates of every currency against the base of the table.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return request_rates(session, url, timeout)
+        except requests.RequestException as error:
+            if attempt == retries or not retryable(error):
+                raise
+        time.sleep(retry_delay(attempt, backoff))
+
+
+class RateCache(object):
+    """
+    In-process and on-disk cache of one exchange rate table, from which every currency pair is derived.
+
+    Only the table of the pivot currency (USD) is fetched; the rate between
+    any two currencies is the ratio of their USD rates, so converting
+    EUR -> JPY and GBP -> BRL share one request. The table is fresh for
+    ``ttl`` seconds. After that it is still served for ``stale_ttl`` more
+    seconds while a background thread fetches a new one (stale-while-
+    revalidate); only a missing or expired table makes the caller wait for
+    the network, and concurrent callers then share a single request.
+    Requests reuse one pooled HTTP session and are retried with jittered
+    backoff.
+
+    Parameters:
+        base_url (str): API endpoint, the pivot currency is appended to it.
+        ttl (float): Seconds a fetched table is fresh.
+        stale_ttl (float): Seconds a table is still served after going stale, while it is refreshed.
+        path (str): Cache file shared between runs, or None to keep the table in memory only.
+        pivot (str): Currency whose table is fetched.
+        timeout (float): Seconds to wait for the API.
+        retries (int): Tries after the first one when a request fails.
+    """
+
+    def __init__(self, base_url=BASE_URL, ttl=3600, stale_ttl=86400, path=CACHE_PATH, pivot="USD", timeout=10,
+                 retries=3):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.path = path
+        self.pivot = pivot
+        self.timeout = timeout
+        self.retries = retries
+        self.session = requests.Session()       # Keeps the connection to the API open between requests.
+        self.lock = threading.Lock()
+        self.fetch_lock = threading.Lock()      # Held while a request is in flight, so only one is sent at a time.
+        self.rates = None                       # Pivot currency table, None until loaded or fetched.
+        self.fetched = 0.0                      # Time the table was fetched (seconds since the epoch).
+        self.loaded = False                     # Whether the cache file was read yet.
+        self.refreshing = False                 # Whether a background refresh is running.
+        self.fetches = 0                        # Number of requests sent to the API.
+
+    def load(self):
+
+        # Reads the table from the cache file the first time it is needed.
+        self.loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("base") == self.pivot and data.get("url") == self.base_url:
+                self.rates = data["rates"]
+                self.fetched = data["fetched"]
+        except (OSError, ValueError, KeyError):
+            pass                                # A damaged cache file is ignored and replaced on the next fetch.
+
+    def save(self):
+
+        # Writes the table to the cache file (to a temporary file first, so readers never see half a file).
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary, "w") as f:
+                json.dump({"base": self.pivot, "url": self.base_url, "fetched": self.fetched, "rates": self.rates}, f)
+            os.replace(temporary, self.path)
+        except OSError:
+            pass                                # The in-process cache still works without a writable disk.
+
+    def fetch(self):
+
+        # Fetches the pivot currency table from the API and stores it in memory and on disk.
+        rates = fetch_rates(self.session, self.base_url + self.pivot, self.timeout, self.retries)
+        with self.lock:
+            self.fetches += 1
+            self.rates = rates
+            self.fetched = time.time()
+            self.save()
+        return rates
+
+    def revalidate(self):
+
+        # Refreshes a stale table in the background; errors keep the stale table until it expires.
+        try:
+            with self.fetch_lock:
+                self.fetch()
+        except (requests.RequestException, ValueError, KeyError):
+            pass
+        finally:
+            self.refreshing = False
+
+    def table(self):
+
+        # Returns the pivot currency table, fetching it only when it is missing or expired.
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            rates = self.rates
+            age = time.time() - self.fetched
+            if rates is not None and age < self.ttl:
+                return rates                                    # Fresh.
+            if rates is not None and age < self.ttl + self.stale_ttl:
+                if not self.refreshing:                         # Stale: serve it and refresh in the background.
+                    self.refreshing = True
+                    threading.Thread(target=self.revalidate, daemon=True).start()
+                return rates
+        with self.fetch_lock:                                   # Missing or expired: wait for the network.
+            if self.rates is not None and time.time() - self.fetched < self.ttl:
+                return self.rates                               # Another caller fetched it while this one waited.
+            try:
+                return self.fetch()
+            except requests.RequestException:
+                if rates is not None:
+                    return rates                                # The API is down: an expired table beats no table.
+                raise
+
+    def rate(self, from_currency, to_currency):
+
+        # Exchange rate between two currencies, derived from the pivot table (KeyError for unknown codes).
+        rates = self.table()
+        return rates[to_currency] / rates[from_currency]
+
+    def rates_for(self, base_currency):
+
+        # Table of every currency against the given base, derived from the pivot table.
+        rates = self.table()
+        base = rates[base_currency]
+        return {currency: rate / base for currency, rate in rates.items()}
+
+
+rate_cache = RateCache()  # Shared cache used by the functions below.
+
+
 def get_exchange_rates(base_currency="USD"):
     
-    # Fetches exchange rates from an API.
-    url = f"https://api.exchangerate-api.com/v4/latest/{base_currency}"  # Constructs the API URL using the base currency.
-    response = requests.get(url)                    # Sends a GET request to the API endpoint.
-    response.raise_for_status()                     # Raises an exception if there's an HTTP error (e.g., 404 Not Found).
-    data = response.json()                          # Parses the JSON response from the API.
-    return data["rates"]                            # Returns a dictionary containing exchange rates for various currencies.
+    # Returns a dictionary containing exchange rates for various currencies, from the cached table.
+    return rate_cache.rates_for(base_currency)
 
 
-def convert_currency(amount, from_currency, to_currency):
+def convert_currency(amount, from_currency, to_currency, on=None):
     
-    # Converts an amount from one currency to another.
-    rates = get_exchange_rates(base_currency=from_currency)     # Fetches exchange rates using the 'from_currency' as the base.
-    converted_amount = amount * rates[to_currency]              # Calculates the converted amount using the exchange rate.
+    # Converts an amount from one currency to another, at the latest rates or at the rates of the day 'on'.
+    if on is not None:
+        return amount * get_rate_history().rate(from_currency, to_currency, on)   # Rate of that day from the stored history.
+    rate = rate_cache.rate(from_currency, to_currency)          # Derives the exchange rate from the cached table.
+    converted_amount = amount * rate                            # Calculates the converted amount using the exchange rate.
     return converted_amount                                     # Returns the converted amount.
 
+
+def convert_historical(amounts, from_currencies, to_currencies, dates):
+    """
+    Convert many amounts, each at the rates of its own day.
+
+    Parameters:
+        amounts (array): Amounts to convert.
+        from_currencies (array or str): Currency of every amount, or one currency for all of them.
+        to_currencies (array or str): Currency to convert every amount to, or one currency for all of them.
+        dates (array): Day of every amount ('2024-05-01' strings, dates or numpy.datetime64).
+
+    Returns:
+        numpy.ndarray: Converted amounts, NaN where a currency or a day is not in the history.
+    """
+    return get_rate_history().convert(amounts, from_currencies, to_currencies, dates)
+
+
+rate_store = None  # Stored rate history, opened on first use.
+
+
+def get_rate_history():
+
+    # Opens the stored rate history the first time a past rate is needed (NumPy is only imported then).
+    global rate_store
+    if rate_store is None:
+        from rate_history import RateHistory
+        rate_store = RateHistory()
+    return rate_store
+
 if __name__ == "__main__":
     while True:
         print("\nCurrency Converter")                                                       # Prints a header for the currency converter.
@@ -32,4 +250,4 @@ if __name__ == "__main__":
             print("Invalid currency code. Please check the currency codes.")                        # Handles invalid currency codes.
 
         if input("\nDo you want to make another conversion? (y/n): ").lower() != 'y':                 # Prompts the user to continue or exit.
-            break # Exits the loop if the user doesn't enter 'y'. 
\ No newline at end of file
+            break # Exits the loop if the user doesn't enter 'y'. 
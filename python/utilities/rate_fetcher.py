@@ -0,0 +1,208 @@
+import argparse  # Imports the 'argparse' library for parsing the command line options.
+import asyncio  # Imports the 'asyncio' library for running many fetches at once.
+import json  # Imports the 'json' library for the answers of the stub server.
+import random  # Imports the 'random' library for the simulated failures of the stub server.
+import threading  # Imports the 'threading' library for running the stub server in the background.
+import time  # Imports the 'time' library for the simulated latency and the benchmark timings.
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Stub API used by the benchmark.
+
+import requests  # Imports the 'requests' library for making HTTP requests to the API.
+from requests.adapters import HTTPAdapter  # Connection pool of the session.
+
+from currency_converter import BASE_URL, request_rates, retryable, retry_delay
+
+
+class AsyncRateFetcher(object):
+    """
+    Fetches exchange rate tables from asyncio code, several at a time.
+
+    Requests go through one requests.Session whose pool keeps up to
+    ``concurrency`` connections alive, and run in worker threads so the event
+    loop is never blocked. Concurrent fetches of the same base currency share
+    a single request in flight. At most ``concurrency`` requests are sent at
+    once; failed ones are retried with jittered exponential backoff.
+
+    Parameters:
+        base_url (str): API endpoint, the base currency is appended to it.
+        concurrency (int): Most requests in flight at once.
+        timeout (float): Seconds to wait for the server on each try.
+        retries (int): Tries after the first one.
+        backoff (float): Upper bound of the first delay between tries, doubled after every try.
+    """
+
+    def __init__(self, base_url=BASE_URL, concurrency=8, timeout=10, retries=3, backoff=0.25):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=concurrency)  # Keep-alive connections per host.
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.inflight = {}          # Base currency -> task fetching its table
+        self.requests = 0           # Number of requests sent, retries included
+
+    async def fetch(self, base_currency="USD"):
+        """
+        Fetch the rate table of a base currency, joining the fetch already in flight for it if there is one.
+
+        Returns:
+            dict: Exchange rates of every currency against the base currency.
+        """
+        task = self.inflight.get(base_currency)
+        if task is None:
+            task = asyncio.ensure_future(self.fetch_once(base_currency))
+            self.inflight[base_currency] = task
+            task.add_done_callback(lambda _: self.inflight.pop(base_currency, None))
+        return await asyncio.shield(task)  # A cancelled caller does not cancel the fetch the others wait for.
+
+    async def fetch_once(self, base_currency):
+
+        # Sends the request of one table, retrying failures that may go away.
+        url = self.base_url + base_currency
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.semaphore:
+                    self.requests += 1
+                    return await asyncio.to_thread(request_rates, self.session, url, self.timeout)
+            except requests.RequestException as error:
+                if attempt == self.retries or not retryable(error):
+                    raise
+            await asyncio.sleep(retry_delay(attempt, self.backoff))
+
+    async def fetch_many(self, base_currencies):
+        """
+        Fetch the tables of several base currencies concurrently.
+
+        Returns:
+            dict: {base currency: exchange rates against it}.
+        """
+        bases = list(dict.fromkeys(base_currencies))
+        tables = await asyncio.gather(*(self.fetch(base) for base in bases))
+        return dict(zip(bases, tables))
+
+    def close(self):
+        self.session.close()
+
+
+def get_many_exchange_rates(base_currencies, **kwargs):
+
+    # Fetches the tables of several base currencies concurrently from synchronous code.
+    async def run():
+        fetcher = AsyncRateFetcher(**kwargs)
+        try:
+            return await fetcher.fetch_many(base_currencies)
+        finally:
+            fetcher.close()
+    return asyncio.run(run())
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers /<base> with a rate table after the server's latency, failing a share of the requests with a 503.
+    """
+
+    protocol_version = "HTTP/1.1"   # Keeps connections alive between requests.
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        with server.lock:
+            server.requests += 1
+            failed = server.rng.random() < server.failure_rate
+        if failed:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        base = self.path.rsplit("/", 1)[-1]
+        rates = {code: 1.0 + i / 10 for i, code in enumerate(("USD", "EUR", "GBP", "JPY", "BRL", "CHF"))}
+        body = json.dumps({"base": base, "rates": {code: rate / rates.get(base, 1.0) for code, rate in rates.items()}})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(latency=0.05, failure_rate=0.0, seed=0):
+
+    # Starts a local stub of the rate API in a background thread and returns the server and its base URL.
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.failure_rate = failure_rate
+    server.rng = random.Random(seed)
+    server.lock = threading.Lock()
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def benchmark(callers=200, bases=("USD", "EUR", "GBP", "JPY", "BRL", "CHF"), latency=0.05, failure_rate=0.0,
+              concurrency=8):
+    """
+    Compare one bare request per caller with the pooled, coalesced fetcher against a local stub server.
+
+    Every caller asks for the table of one of ``bases`` at the same time.
+
+    Returns:
+        dict: {'bare' and 'fetcher': (seconds, requests sent, callers left without a table)}.
+    """
+    server, url = start_stub_server(latency, failure_rate)
+    wanted = [bases[i % len(bases)] for i in range(callers)]
+    results = {}
+    try:
+        # Before: every caller sends its own request, on a new connection, from a worker thread.
+        async def bare():
+            def get(base):
+                response = requests.get(url + base, timeout=10)
+                response.raise_for_status()
+                return response.json()["rates"]
+            return await asyncio.gather(*(asyncio.to_thread(get, base) for base in wanted), return_exceptions=True)
+        sent = server.requests
+        start = time.perf_counter()
+        tables = asyncio.run(bare())
+        results["bare"] = (time.perf_counter() - start, server.requests - sent,
+                           sum(isinstance(table, Exception) for table in tables))
+
+        # After: callers of the same base share one request on a pooled connection.
+        async def coalesced():
+            fetcher = AsyncRateFetcher(url, concurrency=concurrency, backoff=latency)
+            try:
+                return await asyncio.gather(*(fetcher.fetch(base) for base in wanted), return_exceptions=True)
+            finally:
+                fetcher.close()
+        sent = server.requests
+        start = time.perf_counter()
+        tables = asyncio.run(coalesced())
+        results["fetcher"] = (time.perf_counter() - start, server.requests - sent,
+                              sum(isinstance(table, Exception) for table in tables))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch several exchange rate tables concurrently.")
+    parser.add_argument("bases", nargs="*", default=["USD"], help="base currencies to fetch (e.g. USD EUR BRL)")
+    parser.add_argument("--concurrency", type=int, default=8, help="most requests in flight at once")
+    parser.add_argument("--benchmark", action="store_true", help="compare against bare requests on a local stub server")
+    parser.add_argument("--callers", type=int, default=200, help="concurrent callers of the benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the stub server takes to answer")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of stub requests failing with a 503")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        for name, (seconds, sent, failed) in benchmark(args.callers, latency=args.latency, failure_rate=args.failure_rate,
+                                               concurrency=args.concurrency).items():
+            print(f"{name:<8} {args.callers} callers in {seconds:.3f} s with {sent} requests, {failed} failed")
+    else:
+        bases = [base.upper() for base in args.bases]
+        for base, rates in get_many_exchange_rates(bases, concurrency=args.concurrency).items():
+            print(f"{base}: {len(rates)} rates")
@@ -0,0 +1,289 @@
+import argparse  # Imports the 'argparse' library for parsing the command line options.
+import datetime  # Imports the 'datetime' library for recording today's rates.
+import os  # Imports the 'os' library for the size of the store and replacing it when it grows wider.
+import struct  # Imports the 'struct' library for reading and writing the header.
+import time  # Imports the 'time' library for measuring the benchmark throughput.
+
+import numpy as np  # Imports the 'numpy' library for mapping the rate matrix and vectorized lookups.
+
+HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".cache", "currency_history.bin")  # Default store file.
+MAGIC = b"RATEHST1"             # First bytes of every store file.
+HEADER = struct.Struct("<8sIIq")  # Magic, number of currencies, reserved, first day (days since 1970-01-01).
+ALIGN = 64                      # The matrix starts on a multiple of this many bytes.
+
+
+def to_day(date):
+
+    # Day of a date, string ('2024-05-01'), datetime.date or numpy.datetime64, as numpy.datetime64[D].
+    return np.datetime64(date, "D")
+
+
+class RateHistory(object):
+    """
+    Daily exchange rate snapshots stored as one memory-mapped matrix of days x currencies.
+
+    The file holds a small header (the first day and the code of every
+    currency column) followed by a float64 matrix with one row per day, so
+    the rates of any day are found by arithmetic alone. The matrix is mapped
+    with np.memmap: a lookup touches only the pages of the rows it reads, and
+    years of history are never loaded as a whole.
+
+    Each row is one rate table against any base currency; the rate between two
+    currencies is the ratio of their columns, so the base does not matter.
+    Days are appended at the end of the file (days skipped in between repeat
+    the last known rates). A currency not in the header yet widens the matrix,
+    which rewrites the file once. One process at a time may append.
+
+    Parameters:
+        path (str): Store file, created with RateHistory.create().
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self.refresh()
+
+    @classmethod
+    def create(cls, path, currencies, start):
+        """
+        Create an empty store file.
+
+        Parameters:
+            path (str): File to write (replaced if it exists).
+            currencies (list): Codes of the currency columns.
+            start (date): First day of the history.
+
+        Returns:
+            RateHistory: The new store.
+        """
+        codes = b"".join(code.encode().ljust(4, b"\0")[:4] for code in currencies)
+        header = HEADER.pack(MAGIC, len(currencies), 0, int(to_day(start).astype(np.int64))) + codes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(header.ljust(-(-len(header) // ALIGN) * ALIGN, b"\0"))
+        return cls(path)
+
+    def refresh(self):
+
+        # Reads the header and maps the rows in the file now, picking up days appended since the last
+        # mapping and the wider layout of a store another handle replaced with widen().
+        path = self.path
+        with open(path, "rb") as f:
+            magic, count, _, first = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an exchange rate history file")
+            codes = f.read(4 * count)
+            size = os.fstat(f.fileno()).st_size                             # Size of the file the header came from
+            self.currencies = [codes[i:i + 4].rstrip(b"\0").decode() for i in range(0, 4 * count, 4)]
+            self.index = {code: i for i, code in enumerate(self.currencies)}   # Currency code -> column
+            self.start = np.datetime64(first, "D")                              # Day of the first row
+            self.offset = -(-(HEADER.size + 4 * count) // ALIGN) * ALIGN        # Byte where the matrix starts
+            self.days = (size - self.offset) // (8 * count) if count else 0
+            if self.days:
+                self.matrix = np.memmap(f, dtype=np.float64, mode="r", offset=self.offset, shape=(self.days, count))
+            else:
+                self.matrix = np.empty((0, count))  # An empty file region cannot be mapped.
+
+    @property
+    def end(self):
+
+        # Last day of the history (the day before the start when it is empty).
+        return self.start + self.days - 1
+
+    def __len__(self):
+        return self.days
+
+    def row(self, day):
+
+        # Row of a day, mapping the rows appended by another process if the day is past the end.
+        row = int((to_day(day) - self.start).astype(np.int64))
+        if row >= self.days:
+            self.refresh()
+        if not 0 <= row < self.days:
+            raise KeyError(f"No exchange rates on {to_day(day)} (history covers {self.start} to {self.end})")
+        return row
+
+    def rate(self, from_currency, to_currency, on):
+        """
+        Exchange rate between two currencies on a day.
+
+        Raises:
+            KeyError: If a currency or the day is not in the history.
+
+        Returns:
+            float: Units of ``to_currency`` per unit of ``from_currency``.
+        """
+        if from_currency not in self.index or to_currency not in self.index:
+            self.refresh()                  # The currency may have been added by another handle since.
+        row = self.row(on)
+        row = self.matrix[row]
+        return float(row[self.index[to_currency]] / row[self.index[from_currency]])
+
+    def columns(self, codes):
+
+        # Column of every code of an array, -1 for codes not in the history.
+        codes = np.asarray(codes)
+        distinct, inverse = np.unique(codes, return_inverse=True)
+        columns = np.array([self.index.get(str(code), -1) for code in distinct], dtype=np.int64)
+        return columns[inverse].reshape(codes.shape)
+
+    def rates(self, from_currencies, to_currencies, dates):
+        """
+        Exchange rates of many (from, to, date) triples at once.
+
+        Codes and dates may be arrays of the same length or single values. Only
+        the rows of the requested days are read from the file.
+
+        Returns:
+            numpy.ndarray: Units of the to currency per unit of the from currency, NaN for unknown codes or days.
+        """
+        days = np.asarray(dates, dtype="datetime64[D]")
+        sources = self.columns(from_currencies)
+        targets = self.columns(to_currencies)
+        if (days.size and days.max() > self.end) or (sources < 0).any() or (targets < 0).any():
+            # Days or currencies added by another handle since the last mapping
+            self.refresh()
+            sources = self.columns(from_currencies)
+            targets = self.columns(to_currencies)
+        rows = (days - self.start).astype(np.int64)
+        rows, sources, targets = np.broadcast_arrays(rows, sources, targets)
+        valid = (rows >= 0) & (rows < self.days) & (sources >= 0) & (targets >= 0)
+        rates = np.full(rows.shape, np.nan)
+        rows, sources, targets = rows[valid], sources[valid], targets[valid]
+        rates[valid] = self.matrix[rows, targets] / self.matrix[rows, sources]
+        return rates
+
+    def convert(self, amounts, from_currencies, to_currencies, dates):
+
+        # Converts many amounts, each at the rate of its own day (NaN for unknown codes or days).
+        return np.asarray(amounts, dtype=np.float64) * self.rates(from_currencies, to_currencies, dates)
+
+    def append(self, day, rates):
+        """
+        Store the rates of a day.
+
+        A day after the end of the history is appended, repeating the last
+        rates over any days skipped in between; a day already in the history
+        is overwritten in place. Currencies not in the header widen the store.
+
+        Parameters:
+            day (date): Day of the rates.
+            rates (dict): Exchange rates of every currency against one base currency.
+        """
+        day = to_day(day)
+        new = sorted(code for code in rates if code not in self.index)
+        if new:
+            self.widen(new)
+        if not self.days and day != self.start:
+            self.move_start(day)
+        row = int((day - self.start).astype(np.int64))
+        if row < 0:
+            raise ValueError(f"{day} is before the start of the history ({self.start})")
+        values = np.full(len(self.currencies), np.nan)
+        for code, rate in rates.items():
+            values[self.index[code]] = rate
+        with open(self.path, "r+b") as f:
+            if row > self.days:
+                # Days skipped since the end keep the last known rates
+                f.seek(self.offset + self.days * values.nbytes)
+                f.write(np.tile(self.matrix[-1], (row - self.days, 1)).tobytes())
+            f.seek(self.offset + row * values.nbytes)
+            f.write(values.tobytes())
+        self.refresh()
+
+    def move_start(self, day):
+
+        # Sets the first day of an empty history.
+        with open(self.path, "r+b") as f:
+            f.write(HEADER.pack(MAGIC, len(self.currencies), 0, int(day.astype(np.int64))))
+        self.start = day
+
+    def widen(self, codes, chunk_days=4096):
+
+        # Rewrites the store with extra currency columns (NaN on the days already stored).
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        wider = RateHistory.create(temporary, self.currencies + list(codes), self.start)
+        with open(temporary, "r+b") as f:
+            f.seek(wider.offset)
+            for first in range(0, self.days, chunk_days):
+                rows = self.matrix[first:first + chunk_days]
+                f.write(np.hstack([rows, np.full((len(rows), len(codes)), np.nan)]).tobytes())
+        self.matrix = None
+        os.replace(temporary, self.path)
+        self.refresh()
+
+
+def record(history_path=HISTORY_PATH, cache=None):
+
+    # Appends today's table of the shared rate cache to the store, creating the store if needed.
+    from currency_converter import rate_cache
+    rates = (cache or rate_cache).table()
+    today = datetime.date.today()
+    if os.path.exists(history_path):
+        history = RateHistory(history_path)
+    else:
+        history = RateHistory.create(history_path, sorted(rates), today)
+    history.append(today, rates)
+    return history
+
+
+def benchmark(path, years=20, currencies=160, lookups=1000000, seed=0):
+    """
+    Build a synthetic history and time scalar and vectorized lookups.
+
+    Returns:
+        dict: Seconds to 'build' the store, scalar 'rate' lookups per second and vectorized 'rates' per second.
+    """
+    rng = np.random.default_rng(seed)
+    codes = [f"C{i:02d}" for i in range(currencies)]
+    days = 365 * years
+    start = time.perf_counter()
+    history = RateHistory.create(path, codes, "2000-01-01")
+    walk = np.exp(np.cumsum(rng.normal(0, 0.005, (days, currencies)), axis=0))  # Random walk of every rate
+    with open(path, "ab") as f:
+        f.write(walk.tobytes())
+    history.refresh()
+    built = time.perf_counter() - start
+
+    sources = rng.integers(0, currencies, lookups)
+    targets = rng.integers(0, currencies, lookups)
+    dates = history.start + rng.integers(0, days, lookups)
+    from_codes = np.array(codes)[sources]
+    to_codes = np.array(codes)[targets]
+
+    start = time.perf_counter()
+    count = min(lookups, 20000)
+    for i in range(count):
+        history.rate(from_codes[i], to_codes[i], dates[i])
+    scalar = count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    rates = history.rates(from_codes, to_codes, dates)
+    vectorized = lookups / (time.perf_counter() - start)
+    rows = (dates - history.start).astype(np.int64)
+    assert np.allclose(rates, walk[rows, targets] / walk[rows, sources])
+    return {"build": built, "rate": scalar, "rates": vectorized}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record and query daily exchange rate snapshots.")
+    parser.add_argument("query", nargs="*", metavar="FROM TO DATE", help="print the rate of FROM in TO on DATE")
+    parser.add_argument("--path", default=HISTORY_PATH, help="store file")
+    parser.add_argument("--record", action="store_true", help="append today's rates from the API")
+    parser.add_argument("--benchmark", metavar="FILE", help="build a synthetic history in FILE and time lookups")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        result = benchmark(args.benchmark)
+        print(f"Built 20 years x 160 currencies in {result['build']:.2f} s; {result['rate']:,.0f} scalar lookups "
+              f"per second, {result['rates']:,.0f} vectorized lookups per second")
+    elif args.record:
+        history = record(args.path)
+        print(f"{len(history)} days of {len(history.currencies)} currencies, {history.start} to {history.end}")
+    elif len(args.query) == 3:
+        from_currency, to_currency, date = args.query
+        print(f"1 {from_currency.upper()} = {RateHistory(args.path).rate(from_currency.upper(), to_currency.upper(), date):.6f} "
+              f"{to_currency.upper()} on {date}")
+    else:
+        parser.error("give FROM TO DATE, --record or --benchmark")
@@ -0,0 +1,45 @@
+import pytest  # Imports the 'pytest' library for the fixtures and assertions.
+
+from bulk_converter import convert_file
+
+RATES = {"USD": 1.0, "EUR": 0.5, "JPY": 150.0}  # Table passed in, so no request is sent.
+
+
+def convert(tmp_path, text, **kwargs):
+
+    # Converts a CSV source given as text and returns the stats and the lines written.
+    source = tmp_path / "source.csv"
+    destination = tmp_path / "converted.csv"
+    source.write_text(text)
+    stats = convert_file(str(source), str(destination), RATES, **kwargs)
+    return stats, destination.read_text().splitlines()
+
+
+def test_fields_are_written_unchanged(tmp_path):
+    stats, lines = convert(tmp_path, "amount,from,to\n1234567.891,USD,EUR\n7,EUR,usd\n")
+    assert lines == ["amount,from,to,converted", "1234567.891,USD,EUR,617283.95", "7,EUR,usd,14.00"]
+    assert stats["rows"] == 2
+
+
+def test_malformed_amounts_are_kept_without_a_conversion(tmp_path):
+    stats, lines = convert(tmp_path, 'amount,from,to\n,USD,EUR\nabc,USD,EUR\n"1,5",USD,EUR\n2,USD,JPY\n',
+                           chunk_rows=2)
+    assert lines[1:] == [",USD,EUR,", "abc,USD,EUR,", '"1,5",USD,EUR,', "2,USD,JPY,300.00"]
+    assert stats["invalid"] == 3
+    assert stats["unknown"] == 0
+
+
+def test_long_codes_are_unknown_and_not_cut(tmp_path):
+    code = "X" * 40
+    stats, lines = convert(tmp_path, f"amount,from,to\n1,USDX,EUR\n1,{code},EUR\n")
+    assert lines[1:] == ["1,USDX,EUR,", f"1,{code},EUR,"]
+    assert stats["unknown"] == 2
+
+
+def test_failed_conversion_leaves_the_destination_untouched(tmp_path):
+    destination = tmp_path / "converted.csv"
+    destination.write_text("previous")
+    with pytest.raises(ValueError):
+        convert(tmp_path, "amount,from,to\n1,USD,EUR\n2,USD\n", chunk_rows=1)
+    assert destination.read_text() == "previous"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["converted.csv", "source.csv"]  # No temporary file.
@@ -0,0 +1,125 @@
+import json  # Imports the 'json' library for writing cache files by hand.
+import time  # Imports the 'time' library for ageing the cached tables.
+
+import pytest  # Imports the 'pytest' library for the fixtures and assertions.
+import requests  # Imports the 'requests' library for the errors of failed fetches.
+
+import currency_converter
+from currency_converter import RateCache
+from rate_fetcher import start_stub_server
+
+OLD_RATES = {"USD": 1.0, "EUR": 2.0, "JPY": 4.0}  # Table cached before the test, different from the stub's.
+
+
+@pytest.fixture
+def stub():
+
+    # Local stub of the rate API; its table is USD 1.0, EUR 1.1, GBP 1.2, JPY 1.3, BRL 1.4, CHF 1.5.
+    server, url = start_stub_server(latency=0.0)
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+def write_cache(path, url, rates, age):
+
+    # Writes a cache file holding a table fetched ``age`` seconds ago.
+    with open(path, "w") as f:
+        json.dump({"base": "USD", "url": url, "fetched": time.time() - age, "rates": rates}, f)
+
+
+def test_fresh_table_is_served_without_a_request(stub, tmp_path):
+    server, url = stub
+    cache = RateCache(url, ttl=60, path=str(tmp_path / "rates.json"))
+    assert cache.table()["EUR"] == pytest.approx(1.1)
+    assert cache.table()["EUR"] == pytest.approx(1.1)
+    assert cache.fetches == 1
+    assert server.requests == 1
+
+
+def test_expired_table_is_fetched_again(stub, tmp_path):
+    server, url = stub
+    cache = RateCache(url, ttl=60, stale_ttl=60, path=str(tmp_path / "rates.json"))
+    cache.table()
+    cache.fetched -= 121                    # Past both the fresh and the stale period.
+    cache.table()
+    assert cache.fetches == 2
+    assert server.requests == 2
+
+
+def test_stale_table_is_served_while_it_is_refreshed(stub, tmp_path):
+    server, url = stub
+    server.latency = 0.2
+    path = tmp_path / "rates.json"
+    write_cache(path, url, OLD_RATES, age=90)
+    cache = RateCache(url, ttl=60, stale_ttl=60, path=str(path))
+
+    start = time.perf_counter()
+    assert cache.table() == OLD_RATES       # Served at once, without waiting for the slow server.
+    assert time.perf_counter() - start < server.latency
+    assert cache.refreshing
+
+    deadline = time.time() + 5
+    while cache.refreshing and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.fetches == 1
+    assert cache.table()["EUR"] == pytest.approx(1.1)
+    assert server.requests == 1
+
+
+def test_table_is_reloaded_from_disk(stub, tmp_path):
+    server, url = stub
+    path = str(tmp_path / "rates.json")
+    RateCache(url, ttl=60, path=path).table()
+
+    cache = RateCache(url, ttl=60, path=path)   # A new process reading the file the first one wrote.
+    assert cache.table()["JPY"] == pytest.approx(1.3)
+    assert cache.fetches == 0
+    assert server.requests == 1
+
+
+def test_cache_file_of_another_endpoint_is_ignored(stub, tmp_path):
+    server, url = stub
+    path = tmp_path / "rates.json"
+    write_cache(path, "http://elsewhere.invalid/", OLD_RATES, age=0)
+    cache = RateCache(url, ttl=60, path=str(path))
+    assert cache.table()["EUR"] == pytest.approx(1.1)
+    assert cache.fetches == 1
+
+
+def test_expired_table_is_served_when_the_api_fails(stub, tmp_path):
+    server, url = stub
+    server.failure_rate = 1.0                   # Every request fails with a 503.
+    path = tmp_path / "rates.json"
+    write_cache(path, url, OLD_RATES, age=3600)
+    cache = RateCache(url, ttl=60, stale_ttl=60, path=str(path), retries=0)
+    assert cache.table() == OLD_RATES
+    assert server.requests == 1
+
+
+def test_missing_table_raises_when_the_api_fails(stub, tmp_path):
+    server, url = stub
+    server.failure_rate = 1.0
+    cache = RateCache(url, path=str(tmp_path / "rates.json"), retries=0)
+    with pytest.raises(requests.HTTPError):
+        cache.table()
+
+
+def test_cross_rates_are_derived_from_the_pivot_table(stub, tmp_path):
+    server, url = stub
+    cache = RateCache(url, ttl=60, path=str(tmp_path / "rates.json"))
+    assert cache.rate("EUR", "JPY") == pytest.approx(1.3 / 1.1)
+    assert cache.rate("GBP", "BRL") == pytest.approx(1.4 / 1.2)
+    assert cache.rates_for("EUR")["CHF"] == pytest.approx(1.5 / 1.1)
+    assert cache.rates_for("EUR")["EUR"] == pytest.approx(1.0)
+    with pytest.raises(KeyError):
+        cache.rate("USD", "XXX")
+    assert server.requests == 1                 # Every pair came from the one USD table.
+
+
+def test_module_functions_use_the_shared_cache(stub, tmp_path, monkeypatch):
+    server, url = stub
+    monkeypatch.setattr(currency_converter, "rate_cache", RateCache(url, ttl=60, path=str(tmp_path / "rates.json")))
+    assert currency_converter.get_exchange_rates("EUR")["JPY"] == pytest.approx(1.3 / 1.1)
+    assert currency_converter.convert_currency(100, "USD", "BRL") == pytest.approx(140)
+    assert server.requests == 1
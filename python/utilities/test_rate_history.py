@@ -0,0 +1,52 @@
+import numpy as np  # Imports the 'numpy' library for the vectorized lookups.
+import pytest  # Imports the 'pytest' library for the fixtures and assertions.
+
+from rate_history import RateHistory
+
+
+@pytest.fixture
+def store(tmp_path):
+
+    # Store of USD and EUR rates on 2024-01-01 and 2024-01-02 (the 2nd one repeated until the 5th).
+    history = RateHistory.create(str(tmp_path / "history.bin"), ["USD", "EUR"], "2024-01-01")
+    history.append("2024-01-01", {"USD": 1.0, "EUR": 0.9})
+    history.append("2024-01-02", {"USD": 1.0, "EUR": 0.8})
+    history.append("2024-01-05", {"USD": 1.0, "EUR": 0.8})
+    return history
+
+
+def test_rates_of_every_day(store):
+    assert store.rate("USD", "EUR", "2024-01-01") == pytest.approx(0.9)
+    assert store.rate("EUR", "USD", "2024-01-03") == pytest.approx(1 / 0.8)    # Skipped day, previous rates.
+    assert len(store) == 5
+    with pytest.raises(KeyError):
+        store.rate("USD", "EUR", "2024-01-06")
+
+
+def test_vectorized_rates_are_nan_for_unknown_codes_and_days(store):
+    rates = store.rates(["USD", "USD", "XXX"], "EUR", ["2024-01-01", "2023-12-31", "2024-01-01"])
+    assert rates[0] == pytest.approx(0.9)
+    assert np.isnan(rates[1:]).all()
+
+
+def test_reader_sees_days_appended_by_another_handle(store):
+    reader = RateHistory(store.path)
+    store.append("2024-01-06", {"USD": 1.0, "EUR": 0.7})
+    assert reader.rate("USD", "EUR", "2024-01-06") == pytest.approx(0.7)
+
+
+def test_reader_sees_the_store_widened_by_another_handle(store):
+    reader = RateHistory(store.path)
+    store.append("2024-01-06", {"USD": 1.0, "EUR": 0.7, "JPY": 140.0, "BRL": 5.0})
+    assert len(store.currencies) == 4
+
+    # The reader still maps the two-column layout the store had when it was opened.
+    assert reader.rate("USD", "EUR", "2024-01-06") == pytest.approx(0.7)
+    assert reader.rate("USD", "EUR", "2024-01-02") == pytest.approx(0.8)
+    assert reader.rate("EUR", "JPY", "2024-01-06") == pytest.approx(200.0)
+    assert np.isnan(reader.rate("USD", "BRL", "2024-01-01"))                    # Not recorded before widening.
+
+    stale = RateHistory(store.path)
+    store.append("2024-01-07", {"USD": 1.0, "EUR": 0.6, "CHF": 0.9})
+    rates = stale.rates(["USD", "USD", "USD"], ["EUR", "CHF", "JPY"], ["2024-01-07", "2024-01-07", "2024-01-06"])
+    assert rates == pytest.approx([0.6, 0.9, 140.0])
@@ -1,36 +1,109 @@
 import re
 import numpy as np
 
-cpf = '465.684.332-68'
+# Criar os multiplicadores:
+multiplicador_1 = np.array([10, 9, 8, 7, 6, 5, 4, 3, 2])
+multiplicador_2 = np.array([11, 10, 9, 8, 7, 6, 5, 4, 3, 2])
 
 #
 # 1º passo
 #
-def validarCPF(cpf: str):
+def validarCPF(cpf: str) -> bool:
     # Transformar em números inteiros:
-    digitos = re.sub("[^0-9]", "", cpf)
-    digitos_np = np.array([int(i) for i in digitos])
-    
-    # Criar os multiplicadores:
-    multiplicador_1 = np.array([10, 9, 8, 7, 6, 5, 4, 3, 2])
-    multiplicador_2 = np.array([11, 10, 9, 8, 7, 6, 5, 4, 3, 2])
+    digitos = re.sub("[^0-9]", "", str(cpf))
+    if len(digitos) != 11 or len(set(digitos)) == 1:
+        # Tamanho errado ou todos os dígitos iguais (ex.: 111.111.111-11) nunca são CPFs válidos
+        return False
+    digitos_np = np.frombuffer(digitos.encode(), dtype=np.uint8) - ord("0")
 
     # Pegar os 9 primeiros dígitos do CPF,
     # Multiplicar pelos números de 2 a 10 em ordem descrecente,
-    # Multiplicar o resultado da soma por 10 e dividir por 11:
-    primeiro_digito_valido = sum(digitos_np[0:9] * 10 * multiplicador_1) % 11
+    # Multiplicar o resultado da soma por 10 e dividir por 11
+    # (resto 10 vira dígito 0):
+    primeiro_digito_valido = int(digitos_np[0:9] @ multiplicador_1) * 10 % 11 % 10
 
     # Pegar os 10 primeiros números,
     # Multiplicar pelos números de 11 a 2 em ordem descrecente,
-    # Multiplicar o resultado da soma por 10 e dividir por 11:
-    segundo_digito_valido = sum(digitos_np[0:10] * 10 * multiplicador_2) % 11
+    # Multiplicar o resultado da soma por 10 e dividir por 11
+    # (resto 10 vira dígito 0):
+    segundo_digito_valido = int(digitos_np[0:10] @ multiplicador_2) * 10 % 11 % 10
 
     # Se o resto da divisão bater com o primeiro dígito, temos o primeiro ponto de validez e...
     # se o resto da divisão bater com o segundo dígito, temos o segundo ponto de validez
-    if digitos_np[9] == primeiro_digito_valido and digitos_np[10] == segundo_digito_valido:
+    return bool(digitos_np[9] == primeiro_digito_valido and digitos_np[10] == segundo_digito_valido)
+
+
+def matriz_digitos(cpfs):
+    """
+    Normalizar CPFs em uma matriz de dígitos.
+
+    Parâmetros:
+        cpfs (array ou iterável): CPFs como strings (com ou sem pontuação) ou inteiros.
+
+    Retorna:
+        tuple: Matriz (N, 11) uint8 com os dígitos de cada CPF e máscara dos CPFs com exatamente 11 dígitos.
+    """
+    cpfs = np.asarray(cpfs if isinstance(cpfs, np.ndarray) else list(cpfs))
+    if cpfs.ndim != 1:
+        cpfs = cpfs.reshape(-1)
+
+    if cpfs.dtype.kind in "iuf":
+        # Inteiros: o CPF perde os zeros à esquerda, então os 11 dígitos saem das potências de 10
+        # (números com casas decimais ou NaN, comuns em colunas de planilhas, são inválidos)
+        inteiro = np.isfinite(cpfs) & (cpfs == np.round(cpfs)) if cpfs.dtype.kind == "f" else True
+        numeros = np.where(inteiro, cpfs, -1).astype(np.int64)
+        tamanho_ok = (numeros >= 0) & (numeros < 10 ** 11)
+        potencias = 10 ** np.arange(10, -1, -1, dtype=np.int64)
+        return (numeros[:, None] // potencias % 10).astype(np.uint8), tamanho_ok
+
+    # Strings: cada caractere vira um código (bytes para 'S', UCS-4 para 'U'), sem laço em Python
+    if cpfs.dtype.kind not in "SU":
+        cpfs = cpfs.astype(str)
+    largura = max(cpfs.dtype.itemsize // (1 if cpfs.dtype.kind == "S" else 4), 1)
+    codigos = np.ascontiguousarray(cpfs).view(np.uint8 if cpfs.dtype.kind == "S" else np.uint32)
+    codigos = codigos.reshape(len(cpfs), largura)
+
+    # Tirar a pontuação: só os caracteres de '0' a '9' contam, na ordem em que aparecem
+    e_digito = (codigos >= ord("0")) & (codigos <= ord("9"))
+    posicao = np.cumsum(e_digito, axis=1, dtype=np.int32) - 1
+    tamanho_ok = posicao[:, -1] == 10
+    # Dígitos além do 11º (e os que não são dígitos) vão para uma coluna de descarte
+    coluna = np.where(e_digito & (posicao < 11), posicao, 11)
+    digitos = np.zeros((len(cpfs), 12), dtype=np.uint8)
+    digitos[np.arange(len(cpfs))[:, None], coluna] = codigos - ord("0")
+    return digitos[:, :11], tamanho_ok
+
+
+def validate_many(cpfs):
+    """
+    Validar muitos CPFs de uma vez.
+
+    Os CPFs viram uma matriz (N, 11) de dígitos e os dois dígitos
+    verificadores são calculados com produtos de matriz pelos multiplicadores,
+    sem laço em Python por CPF.
+
+    Parâmetros:
+        cpfs (array ou iterável): CPFs como strings (com ou sem pontuação) ou inteiros.
+
+    Retorna:
+        numpy.ndarray: Máscara booleana, True para cada CPF válido.
+    """
+    digitos, tamanho_ok = matriz_digitos(cpfs)
+
+    # Soma ponderada dos 9 e dos 10 primeiros dígitos (cabe em uint16: no máximo 9 * 65 = 585)
+    primeiro_digito_valido = (digitos[:, 0:9] @ multiplicador_1.astype(np.uint16)) * 10 % 11 % 10
+    segundo_digito_valido = (digitos[:, 0:10] @ multiplicador_2.astype(np.uint16)) * 10 % 11 % 10
+
+    # Todos os dígitos iguais passam na conta, mas não são CPFs válidos
+    repetido = (digitos == digitos[:, :1]).all(axis=1)
+
+    return (tamanho_ok & ~repetido
+            & (digitos[:, 9] == primeiro_digito_valido) & (digitos[:, 10] == segundo_digito_valido))
+
+
+if __name__ == "__main__":
+    cpf = '465.684.332-68'
+    if validarCPF(cpf):
         print(f'O CPF {cpf} é válido')
     else:
         print(f'O CPF {cpf} é inválido')
-
-
-validarCPF(cpf)
\ No newline at end of file